@@ -0,0 +1,70 @@
+# alarm_scheduler.py
+import heapq
+from datetime import datetime, timedelta
+
+class AlarmScheduler:
+    """
+    Keeps the next fire instant of every active alarm in a min-heap so the
+    backend only has to look at the head of the heap to know what fires next.
+    The heap is rebuilt from the database whenever an alarm is changed.
+    """
+    # An entry that is older than this when we get round to it (clock jump,
+    # suspended process) is skipped instead of ringing late.
+    GRACE = timedelta(seconds=60)
+
+    def __init__(self):
+        self._heap = []
+        self._alarms = {}
+
+    def rebuild(self, alarms, now):
+        """Rebuilds the heap from an iterable of active alarm rows."""
+        self._alarms = {}
+        heap = []
+        for alarm in alarms:
+            schedule = self._parse(alarm)
+            if schedule is None:
+                continue
+            self._alarms[alarm['id']] = schedule
+            fire_at = self._next_fire_after(schedule, now)
+            if fire_at is not None:
+                heap.append((fire_at, alarm['id']))
+        heapq.heapify(heap)
+        self._heap = heap
+
+    def next_fire(self):
+        """Returns the earliest pending fire datetime, or None."""
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now):
+        """Pops every entry due at `now` and returns the alarm ids to ring."""
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            fire_at, alarm_id = heapq.heappop(self._heap)
+            if now - fire_at < self.GRACE and alarm_id not in due:
+                due.append(alarm_id)
+            next_at = self._next_fire_after(self._alarms[alarm_id], now)
+            if next_at is not None:
+                heapq.heappush(self._heap, (next_at, alarm_id))
+        return due
+
+    def __len__(self):
+        return len(self._heap)
+
+    def _parse(self, alarm):
+        days_mask = alarm['days_mask'] & 0x7F
+        if not days_mask:
+            return None
+        hour, minute = divmod(alarm['minute_of_day'], 60)
+        weekdays = frozenset(d for d in range(7) if days_mask & (1 << d))
+        return hour, minute, weekdays
+
+    def _next_fire_after(self, schedule, now):
+        hour, minute, weekdays = schedule
+        for offset in range(8):
+            day = now.date() + timedelta(days=offset)
+            if day.weekday() not in weekdays:
+                continue
+            candidate = datetime.combine(day, datetime.min.time()).replace(hour=hour, minute=minute)
+            if candidate > now:
+                return candidate
+        return None
@@ -1,58 +1,300 @@
 import sqlite3
+import threading
+import atexit
 import os
+import json
+import time
 
 DB_NAME = "alarms.db"
 
+# One long-lived connection shared by the GUI thread and the worker threads.
+# sqlite3 connections are not safe for concurrent use, so every statement
+# goes through _lock. Statements are sent with constant SQL text so the
+# connection's statement cache reuses the prepared statements.
+_conn = None
+_lock = threading.RLock()
+
+# Debug counters: how many statements actually reached SQLite this session.
+_stats = {"reads": 0, "writes": 0}
+
 def get_connection():
-    conn = sqlite3.connect(DB_NAME)
-    conn.row_factory = sqlite3.Row
-    return conn
+    global _conn
+    with _lock:
+        if _conn is None:
+            conn = sqlite3.connect(DB_NAME, check_same_thread=False, cached_statements=64)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            # NORMAL is durable across app crashes in WAL mode and avoids an
+            # fsync on every commit, which is what hurts on SD cards.
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA cache_size=-2048")
+            conn.execute("PRAGMA temp_store=MEMORY")
+            conn.execute("PRAGMA busy_timeout=5000")
+            _conn = conn
+        return _conn
+
+def close_connection():
+    global _conn
+    with _lock:
+        if _conn is not None:
+            try:
+                _conn.execute("PRAGMA optimize")
+            except sqlite3.Error:
+                pass
+            _conn.close()
+            _conn = None
+
+atexit.register(close_connection)
+
+def _write(sql, params=()):
+    """Single write path: every mutation runs here inside one transaction."""
+    with _lock:
+        conn = get_connection()
+        _stats["writes"] += 1
+        with conn:
+            return conn.execute(sql, params)
+
+def _write_many(sql, seq):
+    """Batched form of _write: one transaction for the whole sequence."""
+    with _lock:
+        conn = get_connection()
+        _stats["writes"] += 1
+        with conn:
+            conn.executemany(sql, seq)
+
+def _read(sql, params=()):
+    with _lock:
+        _stats["reads"] += 1
+        return get_connection().execute(sql, params).fetchall()
+
+def get_stats():
+    """Returns a copy of the read/write counters for debugging."""
+    with _lock:
+        return dict(_stats)
+
+# Schema v1 stores the alarm time as minutes since midnight and the weekdays
+# as a 7-bit mask (bit 0 = Monday ... bit 6 = Sunday). The QML side still
+# sees the old 'HH:MM' / 'Daily' / '0,2,4' strings via alarm_dict().
+# Schema v2 adds the photo cache catalog and the photo rejection list.
+# Schema v3 adds per-album iCloud sync state (stream ctag, known photo GUIDs).
+# Schema v4 records when each cached photo was last shown, for LRU eviction.
+SCHEMA_VERSION = 4
+ALL_DAYS_MASK = 0x7F
+
+def time_to_minute(time_str):
+    hours, minutes = time_str.split(":")
+    return (int(hours) % 24) * 60 + (int(minutes) % 60)
+
+def minute_to_time(minute_of_day):
+    return f"{minute_of_day // 60:02d}:{minute_of_day % 60:02d}"
+
+def days_to_mask(days_str):
+    if days_str == "Daily":
+        return ALL_DAYS_MASK
+    mask = 0
+    for part in days_str.split(","):
+        part = part.strip()
+        if part.isdigit() and int(part) < 7:
+            mask |= 1 << int(part)
+    return mask or ALL_DAYS_MASK
+
+def mask_to_days(days_mask):
+    if days_mask & ALL_DAYS_MASK == ALL_DAYS_MASK:
+        return "Daily"
+    return ",".join(str(d) for d in range(7) if days_mask & (1 << d))
+
+def alarm_dict(alarm_id, minute_of_day, days_mask, active=1, label="Alarm"):
+    """Builds the dict shape QML expects, keeping the compact fields alongside."""
+    return {
+        "id": alarm_id,
+        "time": minute_to_time(minute_of_day),
+        "days": mask_to_days(days_mask),
+        "active": active,
+        "label": label,
+        "minute_of_day": minute_of_day,
+        "days_mask": days_mask
+    }
+
+def _row_to_dict(row):
+    return alarm_dict(row['id'], row['minute_of_day'], row['days_mask'], row['active'], row['label'])
+
+def _migrate_text_schema(conn):
+    """Converts the legacy 'time'/'days' text columns to the compact schema."""
+    rows = conn.execute("SELECT id, time, days, active, label FROM alarms").fetchall()
+    conn.execute("""
+        CREATE TABLE alarms_v1 (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            minute_of_day INTEGER NOT NULL,
+            days_mask INTEGER NOT NULL,
+            active INTEGER DEFAULT 1,
+            label TEXT DEFAULT 'Alarm'
+        )
+    """)
+    for row in rows:
+        try:
+            minute_of_day = time_to_minute(row['time'])
+        except (ValueError, AttributeError):
+            print(f"Skipping alarm {row['id']} with invalid time {row['time']!r}")
+            continue
+        conn.execute(
+            "INSERT INTO alarms_v1 (id, minute_of_day, days_mask, active, label) VALUES (?, ?, ?, ?, ?)",
+            (row['id'], minute_of_day, days_to_mask(row['days'] or "Daily"), row['active'], row['label'])
+        )
+    conn.execute("DROP TABLE alarms")
+    conn.execute("ALTER TABLE alarms_v1 RENAME TO alarms")
+    print(f"Migrated {len(rows)} alarm(s) to schema v{SCHEMA_VERSION}")
 
 def init_db():
-    conn = get_connection()
-    with conn:
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS alarms (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                time TEXT NOT NULL,
-                days TEXT NOT NULL,
-                active INTEGER DEFAULT 1,
-                label TEXT DEFAULT 'Alarm'
-            )
-        """)
-    conn.close()
+    with _lock:
+        conn = get_connection()
+        with conn:
+            columns = {row['name'] for row in conn.execute("PRAGMA table_info(alarms)")}
+            if "time" in columns:
+                _migrate_text_schema(conn)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS alarms (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    minute_of_day INTEGER NOT NULL,
+                    days_mask INTEGER NOT NULL,
+                    active INTEGER DEFAULT 1,
+                    label TEXT DEFAULT 'Alarm'
+                )
+            """)
+            # Covers "which active alarms fire at this minute" without touching the table.
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_alarms_active_minute
+                ON alarms (active, minute_of_day, days_mask)
+            """)
+            # One row per file in assets/image_cache. Files whose size and
+            # mtime still match are trusted without being read again.
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS photo_cache (
+                    file TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    digest TEXT NOT NULL,
+                    cache_key TEXT,
+                    last_shown INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            if "last_shown" not in {row['name'] for row in conn.execute("PRAGMA table_info(photo_cache)")}:
+                conn.execute("ALTER TABLE photo_cache ADD COLUMN last_shown INTEGER NOT NULL DEFAULT 0")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_photo_cache_digest ON photo_cache (digest)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS photo_rejections (
+                    rejection_key TEXT PRIMARY KEY,
+                    reason TEXT DEFAULT 'low_res',
+                    rejected_at INTEGER
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS icloud_albums (
+                    token TEXT PRIMARY KEY,
+                    stream_ctag TEXT,
+                    host TEXT
+                )
+            """)
+            # cache_keys is a JSON list of the image cache keys the GUID resolved
+            # to, so a photo removed from the album can be pruned from the cache.
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS icloud_album_photos (
+                    token TEXT NOT NULL,
+                    guid TEXT NOT NULL,
+                    cache_keys TEXT NOT NULL DEFAULT '[]',
+                    tries INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (token, guid)
+                )
+            """)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
 
 def add_alarm(time_str, days_str):
-    conn = get_connection()
-    with conn:
-        conn.execute("INSERT INTO alarms (time, days, active) VALUES (?, ?, 1)", 
-                     (time_str, days_str))
-    conn.close()
+    """Inserts an active alarm and returns it in QML dict shape."""
+    minute_of_day, days_mask = time_to_minute(time_str), days_to_mask(days_str)
+    cur = _write("INSERT INTO alarms (minute_of_day, days_mask, active) VALUES (?, ?, 1)",
+                 (minute_of_day, days_mask))
+    return alarm_dict(cur.lastrowid, minute_of_day, days_mask)
 
 def update_alarm(alarm_id, time_str, days_str):
     """Updates an existing alarm."""
-    conn = get_connection()
-    with conn:
-        conn.execute("UPDATE alarms SET time = ?, days = ? WHERE id = ?", 
-                     (time_str, days_str, alarm_id))
-    conn.close()
+    _write("UPDATE alarms SET minute_of_day = ?, days_mask = ? WHERE id = ?",
+           (time_to_minute(time_str), days_to_mask(days_str), alarm_id))
 
 def toggle_alarm(alarm_id, active_state):
     """Toggles alarm on (1) or off (0)."""
-    conn = get_connection()
-    with conn:
-        conn.execute("UPDATE alarms SET active = ? WHERE id = ?", 
-                     (1 if active_state else 0, alarm_id))
-    conn.close()
-
-def get_active_alarms():
-    conn = get_connection()
-    alarms = conn.execute("SELECT * FROM alarms WHERE active = 1").fetchall()
-    conn.close()
-    return alarms
+    _write("UPDATE alarms SET active = ? WHERE id = ?",
+           (1 if active_state else 0, alarm_id))
+
+def delete_alarm(alarm_id):
+    _write("DELETE FROM alarms WHERE id = ?", (alarm_id,))
+
+def get_alarms_due(minute_of_day, weekday):
+    """Ids of active alarms firing at minute_of_day on weekday (0 = Monday)."""
+    rows = _read("SELECT id FROM alarms WHERE active = 1 AND minute_of_day = ? AND (days_mask & ?) != 0",
+                 (minute_of_day, 1 << weekday))
+    return [row['id'] for row in rows]
 
 def get_all_alarms():
-    conn = get_connection()
-    rows = conn.execute("SELECT * FROM alarms ORDER BY time ASC").fetchall()
-    conn.close()
-    return [dict(row) for row in rows]
\ No newline at end of file
+    rows = _read("SELECT * FROM alarms ORDER BY minute_of_day ASC, id ASC")
+    return [_row_to_dict(row) for row in rows]
+
+def photo_entry(file, size, mtime_ns, digest, cache_key=None, last_shown=0):
+    return {"file": file, "size": size, "mtime_ns": mtime_ns, "digest": digest, "cache_key": cache_key, "last_shown": last_shown}
+
+def get_photo_catalog():
+    """All catalogued cache files, keyed by file name."""
+    rows = _read("SELECT file, size, mtime_ns, digest, cache_key, last_shown FROM photo_cache")
+    return {row['file']: photo_entry(row['file'], row['size'], row['mtime_ns'], row['digest'], row['cache_key'], row['last_shown']) for row in rows}
+
+def upsert_photo_entries(entries):
+    """
+    Inserts or replaces catalog rows. A known cache_key is kept if the new
+    entry has none; last_shown is only ever changed by touch_photo_entries.
+    """
+    _write_many(
+        """INSERT INTO photo_cache (file, size, mtime_ns, digest, cache_key) VALUES (?, ?, ?, ?, ?)
+           ON CONFLICT(file) DO UPDATE SET size = excluded.size, mtime_ns = excluded.mtime_ns,
+           digest = excluded.digest, cache_key = COALESCE(excluded.cache_key, photo_cache.cache_key)""",
+        [(e["file"], e["size"], e["mtime_ns"], e["digest"], e["cache_key"]) for e in entries]
+    )
+
+def delete_photo_entries(files):
+    _write_many("DELETE FROM photo_cache WHERE file = ?", [(f,) for f in files])
+
+def get_photo_rejections():
+    return {row['rejection_key'] for row in _read("SELECT rejection_key FROM photo_rejections WHERE reason != 'evicted'")}
+
+def get_evicted_photos():
+    """{cache file stem: unix time it was evicted} for photos dropped by the cache quota."""
+    return {row['rejection_key']: row['rejected_at'] or 0
+            for row in _read("SELECT rejection_key, rejected_at FROM photo_rejections WHERE reason = 'evicted'")}
+
+def forget_evicted_photos(stems):
+    _write_many("DELETE FROM photo_rejections WHERE rejection_key = ? AND reason = 'evicted'", [(stem,) for stem in stems])
+
+def add_photo_rejections(keys, reason="low_res"):
+    now = int(time.time())
+    _write_many("INSERT OR IGNORE INTO photo_rejections (rejection_key, reason, rejected_at) VALUES (?, ?, ?)",
+                [(key, reason, now) for key in keys])
+
+def get_icloud_album(token):
+    """Sync state of one shared album: ctag, host and {guid: {cache_keys, tries}}."""
+    rows = _read("SELECT stream_ctag, host FROM icloud_albums WHERE token = ?", (token,))
+    album = {"stream_ctag": rows[0]['stream_ctag'] if rows else None, "host": rows[0]['host'] if rows else None, "photos": {}}
+    for row in _read("SELECT guid, cache_keys, tries FROM icloud_album_photos WHERE token = ?", (token,)):
+        album["photos"][row['guid']] = {"cache_keys": json.loads(row['cache_keys']), "tries": row['tries']}
+    return album
+
+def save_icloud_album(token, stream_ctag, host):
+    _write("INSERT OR REPLACE INTO icloud_albums (token, stream_ctag, host) VALUES (?, ?, ?)", (token, stream_ctag, host))
+
+def upsert_icloud_photos(token, photos):
+    """photos: {guid: {"cache_keys": [...], "tries": n}}"""
+    _write_many("INSERT OR REPLACE INTO icloud_album_photos (token, guid, cache_keys, tries) VALUES (?, ?, ?, ?)",
+                [(token, guid, json.dumps(p["cache_keys"]), p["tries"]) for guid, p in photos.items()])
+
+def delete_icloud_photos(token, guids):
+    _write_many("DELETE FROM icloud_album_photos WHERE token = ? AND guid = ?", [(token, guid) for guid in guids])
+
+def touch_photo_entries(shown):
+    """shown: {file: unix time it was last on screen}"""
+    _write_many("UPDATE photo_cache SET last_shown = ? WHERE file = ?", [(ts, f) for f, ts in shown.items()])
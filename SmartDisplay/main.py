@@ -3,6 +3,7 @@ import os
 import random
 import threading
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import asyncio
 import subprocess 
@@ -11,20 +12,27 @@ import base64
 import secrets as pysecrets
 import time
 import re
+import heapq
+import tempfile
 from http.server import BaseHTTPRequestHandler, HTTPServer
 from urllib.parse import urlencode, urlparse, parse_qs
 from datetime import datetime, timedelta, date
 from pathlib import Path
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from icalendar import Calendar
+from dateutil.rrule import rruleset, rrulestr
+from zoneinfo import ZoneInfo
 from kasa import Discover
 
-from PySide6.QtGui import QGuiApplication, QImage
+from PySide6.QtGui import QGuiApplication, QImage, QImageReader, QImageWriter, QImageIOHandler
 from PySide6.QtQml import QQmlApplicationEngine
-from PySide6.QtCore import QObject, Signal, Property, QTimer, Slot, QUrl, Qt
+from PySide6.QtCore import QObject, Signal, Property, QTimer, Slot, QUrl, Qt, QSize
 from PySide6.QtMultimedia import QMediaPlayer, QAudioOutput
 
 import database
+from alarm_scheduler import AlarmScheduler
 
 class SmartClockBackend(QObject):
     timeChanged = Signal()
@@ -38,6 +46,102 @@ class SmartClockBackend(QObject):
     snoozeChanged = Signal()
     spotifyChanged = Signal()
     imagesChanged = Signal()
+    # Internal: a poll worker finished and reports the delay (ms) until the next poll.
+    _spotifyPollFinished = Signal(int)
+
+    # Poll intervals (seconds) for the Tapo status loop.
+    TAPO_POLL_INTERVAL = 2.0
+    TAPO_FAST_POLL_INTERVAL = 0.5
+    TAPO_FAST_WINDOW_SECONDS = 10.0
+    TAPO_NIGHT_POLL_INTERVAL = 30.0
+    TAPO_MAX_BACKOFF = 120.0
+    # Per-device command timeout so one slow bulb can't hold up the others.
+    TAPO_DEVICE_TIMEOUT = 5.0
+
+    # Spotify poll delays (milliseconds), chosen per poll from the playback state.
+    SPOTIFY_FAST_POLL_MS = 1500
+    SPOTIFY_FAST_WINDOW_SECONDS = 15
+    SPOTIFY_PLAYING_MAX_POLL_MS = 20000
+    SPOTIFY_PAUSED_POLL_MS = 15000
+    SPOTIFY_IDLE_POLL_MS = 30000
+    SPOTIFY_NIGHT_POLL_MS = 60000
+    SPOTIFY_SCREEN_OFF_POLL_MS = 120000
+    SPOTIFY_ERROR_POLL_MS = 30000
+    SPOTIFY_DEVICES_REFRESH_SECONDS = 60
+    # The follow-up playback refresh waits until commands have stopped
+    # arriving for this long, so a slider drag costs one refresh, not one per step.
+    SPOTIFY_COMMAND_QUIET_SECONDS = 0.5
+
+    # Album art is cached on disk at the largest size the UI draws it.
+    ALBUM_ART_SIZE = 480
+    ALBUM_ART_CACHE_BYTES = 25 * 1024 * 1024
+
+    # Remote calendar feeds are fetched in parallel and only when due.
+    CALENDAR_FETCH_WORKERS = 4
+    CALENDAR_FEED_REFRESH_SECONDS = 600
+    CALENDAR_FEED_MAX_REFRESH_SECONDS = 3600
+    CALENDAR_FEED_RETRY_SECONDS = 120
+    # Recurring events are expanded only inside this window around today.
+    CALENDAR_PAST_DAYS = 60
+    CALENDAR_LOOKAHEAD_DAYS = 200
+    CALENDAR_MAX_OCCURRENCES = 1000
+    # Photo downloads run on a bounded pool; each host gets at most
+    # PHOTO_DOWNLOAD_PER_HOST connections so one CDN isn't hammered.
+    # Both can be overridden in secrets.json.
+    PHOTO_DOWNLOAD_WORKERS = 6
+    PHOTO_DOWNLOAD_PER_HOST = 3
+    PHOTO_MIN_SIDE_PX = 900
+    # Dimensions are read from the first bytes of the response; anything
+    # outside these limits is dropped before the body is transferred.
+    PHOTO_PROBE_MAX_BYTES = 128 * 1024
+    PHOTO_STREAM_CHUNK_BYTES = 16 * 1024
+    PHOTO_MAX_PIXELS = 60_000_000
+    PHOTO_MAX_BYTES = 40 * 1024 * 1024
+    # Slideshow copies are scaled to cover the screen and stored as
+    # progressive JPEGs in assets/image_display.
+    PHOTO_DERIVATIVE_WORKERS = 2
+    PHOTO_DERIVATIVE_QUALITY = 85
+    # image_cache is kept under these quotas (overridable in secrets.json as
+    # photo_cache_max_mb / photo_cache_max_files). Once over, eviction removes
+    # PHOTO_EVICT_BATCH files at a time, least recently shown first, down to
+    # PHOTO_CACHE_LOW_WATER of the quota so new photos have room to land.
+    PHOTO_CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024
+    PHOTO_CACHE_MAX_FILES = 3000
+    PHOTO_CACHE_LOW_WATER = 0.85
+    PHOTO_EVICT_BATCH = 25
+    # An evicted photo isn't downloaded again for this long; after that it
+    # rejoins the rotation as a fresh download.
+    PHOTO_EVICTED_TTL_SECONDS = 3 * 24 * 3600
+
+    # A shared-album GUID that never produces a cached file (video, every
+    # derivative rejected...) is re-resolved at most this many times.
+    ICLOUD_MAX_GUID_TRIES = 3
+    # Incremental (ctag) syncs can't reveal removals except through explicit
+    # markers, so a full listing is requested this often.
+    ICLOUD_FULL_SYNC_SECONDS = 6 * 3600
+    _ICLOUD_DELETED_LIST_KEYS = ("deletedPhotoGuids", "deletedGuids")
+    _ICLOUD_DELETED_FLAGS = ("isDeleted", "deleted")
+    # webasseturls is asked for this many GUIDs per request.
+    ICLOUD_ASSET_BATCH_SIZE = 25
+    ICLOUD_ASSET_WORKERS = 3
+    ICLOUD_ASSET_ATTEMPTS = 3
+    _URL_SCHEME_RE = re.compile(r"[a-zA-Z][a-zA-Z0-9+.-]*://")
+    _IMAGE_URL_KEYS = ("url", "downloadUrl", "photoUrl", "webAssetUrl")
+    # Gallery pages are scanned in chunks with one byte pattern: an http(s)
+    # URL (JSON-escaped slashes allowed) ending in an image extension,
+    # optionally followed by a query string.
+    PHOTO_PAGE_CHUNK_BYTES = 64 * 1024
+    _IMAGE_URL_RE = re.compile(
+        rb"https?:(?:\\?/){2}(?:[^\"'\\\s<>]|\\/)+?\.(?:jpe?g|png|bmp|webp)"
+        rb"(?:\?(?:[^\"'\\\s<>]|\\/)*)?(?![^\"'\\\s<>])",
+        re.IGNORECASE
+    )
+    _URL_DELIMITERS = (b'"', b"'", b"<", b">", b" ", b"\n")
+
+    # Feeds are read and split into VEVENTs in chunks of this size.
+    CALENDAR_READ_CHUNK_BYTES = 64 * 1024
+    CALENDAR_SPOOL_BYTES = 1024 * 1024
+    _ICAL_PROP_RE = re.compile(rb"([A-Za-z0-9-]+)[;:](.*)")
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -46,6 +150,12 @@ class SmartClockBackend(QObject):
         self._is_night_mode = False
         self._calendar_events = [] 
         self._is_fetching_calendar = False 
+        self._calendar_feeds = {}
+        self._calendar_files = {}
+        self._calendar_labels_date = None
+        self._calendar_day_index = {}
+        self._calendar_revision = 0
+        self._calendar_adapter = HTTPAdapter(pool_connections=8, pool_maxsize=self.CALENDAR_FETCH_WORKERS)
         
         # --- 1. LOAD SECRETS ---
         self.secrets = self._load_secrets()
@@ -73,6 +183,8 @@ class SmartClockBackend(QObject):
         self._spotify_track = "Nothing Playing"
         self._spotify_artist = "Spotify"
         self._spotify_album_art = ""
+        self._spotify_album_art_source = ""
+        self._spotify_track_id = ""
         self._spotify_is_playing = False
         self._spotify_device_name = "No Device"
         self._spotify_volume = 0
@@ -80,21 +192,65 @@ class SmartClockBackend(QObject):
         self._spotify_selected_device_id = ""
         self._spotify_status = "Not Connected"
         self._spotify_poll_count = 0
+        self._spotify_progress_ms = 0
+        self._spotify_duration_ms = 0
+        self._spotify_progress_at = 0.0
+        self._spotify_fast_until = 0.0
+        self._spotify_devices_fetched_at = 0.0
+        self._screen_is_on = True
         self._spotify_lock = threading.Lock()
+        # Connection pools (thread-safe in urllib3) shared by per-thread
+        # sessions, so keep-alive connections are reused across workers.
+        self._spotify_adapter = HTTPAdapter(pool_connections=2, pool_maxsize=8)
+        self._http_sessions = threading.local()
+        self._spotify_http_stats_lock = threading.Lock()
+        self._spotify_http_stats = {"requests": 0, "errors": 0, "total_ms": 0.0, "avg_ms": 0.0}
         self._spotify_poll_lock = threading.Lock()
         self._spotify_poll_inflight = False
+        # Control commands run one at a time on a single worker. Pending
+        # commands are keyed so a newer volume/transfer replaces an older one.
+        self._spotify_commands = OrderedDict()
+        self._spotify_command_seq = 0
+        self._spotify_refresh_devices_after = False
+        self._spotify_last_command_at = 0.0
+        # Set while a volume change is queued, in flight or waiting for its
+        # follow-up refresh; fetches then leave the optimistic volume alone.
+        self._spotify_volume_hold = False
+        self._spotify_command_cond = threading.Condition()
+        threading.Thread(target=self._spotify_command_worker, daemon=True).start()
         self._image_refresh_lock = threading.Lock()
         self._image_refresh_inflight = False
         self._last_image_refresh_at = 0.0
         self._image_refresh_interval_seconds = 300
+        self._photo_download_workers = max(1, int(self.secrets.get("photo_download_workers", self.PHOTO_DOWNLOAD_WORKERS)))
+        self._photo_download_per_host = max(1, int(self.secrets.get("photo_download_per_host", self.PHOTO_DOWNLOAD_PER_HOST)))
+        self._photo_adapter = HTTPAdapter(pool_connections=8, pool_maxsize=self._photo_download_workers)
+        # Gallery page URL -> {etag, last_modified, urls} of its last scan.
+        self._photo_page_cache = {}
+        # Album token -> monotonic time of its last full (no ctag) webstream sync.
+        self._icloud_full_sync_at = {}
+        self._icloud_adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.ICLOUD_ASSET_WORKERS)
+        # Guards cache_content_hashes, _low_res_rejections and the per-host slots
+        # while downloads run in parallel.
+        self._photo_download_lock = threading.Lock()
+        self._photo_host_slots = {}
         
         # --- ASYNC SETUP ---
-        self._bulb_device = None
+        self._tapo_devices = self._load_tapo_devices()
+        self._tapo_wake = None
+        self._tapo_failures = 0
+        self._tapo_fast_until = 0.0
+        self._tapo_stats = {"polls": 0, "failures": 0, "last_latency_ms": 0.0, "avg_latency_ms": 0.0}
         self.tapo_loop = asyncio.new_event_loop()
         self.tapo_thread = threading.Thread(target=self._run_tapo_loop, daemon=True)
         self.tapo_thread.start()
+        if self._tapo_devices:
+            asyncio.run_coroutine_threadsafe(self._tapo_poll_loop(), self.tapo_loop)
         
         database.init_db()
+        self._alarm_scheduler = AlarmScheduler()
+        self._alarm_cache = database.get_all_alarms()
+        self._sort_alarm_cache()
 
         # Paths
         base_path = Path(__file__).resolve().parent
@@ -102,6 +258,8 @@ class SmartClockBackend(QObject):
         self.cal_path.mkdir(parents=True, exist_ok=True)
         self.cal_links_file = base_path / "assets" / "calendar_links.json"
         self.cal_links_legacy_file = base_path / "assets" / "calendar_links.txt"
+        self.cal_cache_file = base_path / "assets" / "calendar_cache.json"
+        self._load_calendar_cache()
         self.weather_asset_path = base_path / "assets" / "weather"
         self.weather_asset_path.mkdir(parents=True, exist_ok=True)
         self.spotify_token_file = base_path / "assets" / "spotify_token.json"
@@ -112,8 +270,37 @@ class SmartClockBackend(QObject):
         self.image_cache_path.mkdir(parents=True, exist_ok=True)
         self.image_source_path = base_path / "assets" / "images"
         self.image_source_path.mkdir(parents=True, exist_ok=True)
+        self.image_display_path = base_path / "assets" / "image_display"
+        self.image_display_path.mkdir(parents=True, exist_ok=True)
+        self._display_size = self._detect_display_size()
+        self._photo_keep_originals = self._secret_flag("photo_keep_originals", True)
+        self._photo_cache_max_bytes = int(self.secrets.get("photo_cache_max_mb", self.PHOTO_CACHE_MAX_BYTES // (1024 * 1024))) * 1024 * 1024
+        self._photo_cache_max_files = int(self.secrets.get("photo_cache_max_files", self.PHOTO_CACHE_MAX_FILES))
+        # file -> time shown, reported by the slideshow and written to the
+        # catalog in one batch on the next eviction pass.
+        self._photo_shown_pending = {}
+        self._photo_shown_lock = threading.Lock()
+        # Stems of cache files still referenced by a configured album, or None
+        # if the last refresh couldn't resolve every source.
+        self._photo_live_stems = None
+        self._photo_derivative_pool = ThreadPoolExecutor(max_workers=self.PHOTO_DERIVATIVE_WORKERS, thread_name_prefix="photo-derivative")
+        # Files already checked this session that are no bigger than the screen.
+        self._photo_derivative_skipped = set()
         self._image_urls = self._load_local_images()
-        self._low_res_rejections = self._load_low_res_rejections()
+        self._migrate_photo_rejections_file()
+        self._low_res_rejections = database.get_photo_rejections()
+        # Stem -> eviction time of cache files the quota evicted. They aren't
+        # downloaded again until PHOTO_EVICTED_TTL_SECONDS have passed, or every
+        # refresh would refill the cache only for eviction to delete it again.
+        self._photo_evicted = database.get_evicted_photos()
+        # In-memory view of the photo_cache table, owned by the refresh worker.
+        self._photo_catalog = database.get_photo_catalog()
+        self.album_art_cache_path = base_path / "assets" / "album_art_cache"
+        self.album_art_cache_path.mkdir(parents=True, exist_ok=True)
+        self._album_art_lock = threading.Lock()
+        self._album_art_index = self._load_album_art_index()
+        # Cache filename -> Event set when its in-progress download finishes.
+        self._album_art_downloads = {}
 
         # Audio Setup
         self.player = QMediaPlayer()
@@ -124,16 +311,38 @@ class SmartClockBackend(QObject):
         self.audio_output.setVolume(1.0)
         self.player.setLoops(QMediaPlayer.Loops.Infinite)
 
-        # Timer
-        self._timer = QTimer(self)
-        self._timer.timeout.connect(self._tick)
-        self._timer.start(1000)
+        # Clock timers are single-shot and re-armed for the next wall-clock
+        # deadline, so the process only wakes when something actually changes.
+        self._minute_timer = QTimer(self)
+        self._minute_timer.setSingleShot(True)
+        self._minute_timer.setTimerType(Qt.PreciseTimer)
+        self._minute_timer.timeout.connect(self._on_minute_timer)
+        self._next_minute_at = None
+
+        self._night_timer = QTimer(self)
+        self._night_timer.setSingleShot(True)
+        self._night_timer.setTimerType(Qt.PreciseTimer)
+        self._night_timer.timeout.connect(self._on_night_timer)
+
+        self._weather_timer = QTimer(self)
+        self._weather_timer.setSingleShot(True)
+        self._weather_timer.setTimerType(Qt.PreciseTimer)
+        self._weather_timer.timeout.connect(self._on_weather_timer)
+
+        # Alarms are fired by a single-shot timer armed for the next fire instant.
+        self._alarm_timer = QTimer(self)
+        self._alarm_timer.setSingleShot(True)
+        self._alarm_timer.setTimerType(Qt.PreciseTimer)
+        self._alarm_timer.timeout.connect(self._on_alarm_timer)
+        self._reschedule_alarms()
 
         # Spotify polling is independent of clock tick so metadata stays fresh.
+        # Each poll re-arms this single-shot timer with an adaptive delay.
         self._spotify_timer = QTimer(self)
-        self._spotify_timer.setInterval(2000)
+        self._spotify_timer.setSingleShot(True)
         self._spotify_timer.timeout.connect(self._spotify_poll)
-        self._spotify_timer.start()
+        self._spotifyPollFinished.connect(self._arm_spotify_timer)
+        self._spotify_timer.start(self.SPOTIFY_FAST_POLL_MS)
 
         # --- SCREEN BLANKING TIMER ---
         self._inactivity_timer = QTimer(self)
@@ -159,6 +368,10 @@ class SmartClockBackend(QObject):
             self._spotify_fetch_devices()
             self._spotify_fetch_playback()
         self._tick()
+        self._update_night_mode(datetime.now())
+        self._arm_minute_timer()
+        self._arm_night_timer()
+        self._arm_weather_timer()
 
     def _load_secrets(self):
         paths = [
@@ -172,6 +385,26 @@ class SmartClockBackend(QObject):
                 except: pass
         return {}
 
+    def _secret_flag(self, key, default):
+        """
+        Reads an on/off setting. JSON booleans are used as-is; quoted forms
+        like "false"/"0"/"no"/"off" (or "true"/"1"/"yes"/"on") are accepted
+        too, and anything else falls back to the default.
+        """
+        value = self.secrets.get(key, default)
+        if isinstance(value, bool):
+            return value
+        if isinstance(value, int):
+            return value != 0
+        if isinstance(value, str):
+            text = value.strip().lower()
+            if text in ("false", "0", "no", "off"):
+                return False
+            if text in ("true", "1", "yes", "on"):
+                return True
+        print(f"Ignoring invalid {key} setting {value!r}, using {default}")
+        return default
+
     # --- SCREEN CONTROL LOGIC (X11 TIMEOUT FIX) ---
     def _init_x11_defaults(self):
         """Disable auto-blanking on startup."""
@@ -183,6 +416,7 @@ class SmartClockBackend(QObject):
         Requires 'Screen Blanking' to be ENABLED in raspi-config for capabilities,
         but we set the timeout to 0 (infinity) here to control it manually.
         """
+        self._screen_is_on = on
         env = os.environ.copy()
         env["DISPLAY"] = ":0"
         
@@ -230,52 +464,171 @@ class SmartClockBackend(QObject):
     @Property(bool, notify=lightStateChanged)
     def lightIsOn(self): return self._light_is_on
 
+    def _load_tapo_devices(self):
+        """
+        Builds the device registry from 'tapo_devices' (a list of IPs or of
+        {"ip", "email", "password"} objects) plus the legacy single 'tapo_ip'.
+        """
+        configs = []
+        for entry in self.secrets.get("tapo_devices", []):
+            if isinstance(entry, str):
+                entry = {"ip": entry}
+            if isinstance(entry, dict) and str(entry.get("ip", "")).strip():
+                configs.append(entry)
+        if self.TAPO_IP and all(c["ip"].strip() != self.TAPO_IP for c in configs):
+            configs.insert(0, {"ip": self.TAPO_IP})
+        devices = []
+        for config in configs:
+            devices.append({
+                "ip": config["ip"].strip(),
+                "email": config.get("email", self.TAPO_EMAIL),
+                "password": config.get("password", self.TAPO_PASSWORD),
+                "device": None,
+                "lock": None,
+                "is_on": None,
+                "failures": 0,
+                "retry_at": 0.0
+            })
+        return devices
+
     @Slot()
     def toggleLight(self):
         self._light_is_on = not self._light_is_on
         self.lightStateChanged.emit()
-        asyncio.run_coroutine_threadsafe(self._async_tapo_toggle(), self.tapo_loop)
-
-    def _check_light_status(self):
-        asyncio.run_coroutine_threadsafe(self._async_tapo_status(), self.tapo_loop)
-
-    async def _get_bulb(self):
-        if self._bulb_device: return self._bulb_device
-        if not self.TAPO_IP: return None
+        # Watch closely for a short while so the real bulb state lands quickly.
+        self._tapo_fast_until = time.monotonic() + self.TAPO_FAST_WINDOW_SECONDS
+        asyncio.run_coroutine_threadsafe(self._async_tapo_toggle(self._light_is_on), self.tapo_loop)
+
+    @Slot(result="QVariantMap")
+    def lightPollStats(self):
+        devices = {e["ip"]: {"connected": e["device"] is not None, "failures": e["failures"]} for e in self._tapo_devices}
+        return dict(self._tapo_stats, consecutive_failures=self._tapo_failures, devices=devices)
+
+    def _tapo_backoff_delay(self, failures):
+        ceiling = min(self.TAPO_MAX_BACKOFF, self.TAPO_POLL_INTERVAL * (2 ** failures))
+        return random.uniform(ceiling / 2, ceiling)
+
+    def _tapo_next_poll_delay(self):
+        if self._tapo_failures:
+            # Every device is unreachable: back off the whole loop.
+            return self._tapo_backoff_delay(self._tapo_failures)
+        if time.monotonic() < self._tapo_fast_until:
+            return self.TAPO_FAST_POLL_INTERVAL
+        if self._is_night_mode:
+            return self.TAPO_NIGHT_POLL_INTERVAL
+        return self.TAPO_POLL_INTERVAL
+
+    async def _tapo_poll_loop(self):
+        """Single status poller: at most one poll round in flight at any time."""
+        self._tapo_wake = asyncio.Event()
+        while True:
+            started = time.monotonic()
+            try:
+                ok = await self._async_tapo_status()
+            except Exception:
+                ok = False
+            latency_ms = (time.monotonic() - started) * 1000
+            stats = self._tapo_stats
+            stats["polls"] += 1
+            stats["last_latency_ms"] = round(latency_ms, 1)
+            stats["avg_latency_ms"] = round(stats["avg_latency_ms"] + (latency_ms - stats["avg_latency_ms"]) / stats["polls"], 1)
+            if ok:
+                if self._tapo_failures:
+                    print(f"[Light] Devices reachable again after {self._tapo_failures} failed poll(s)", flush=True)
+                self._tapo_failures = 0
+            else:
+                stats["failures"] += 1
+                self._tapo_failures += 1
+                if self._tapo_failures == 1:
+                    print("[Light] No device reachable, backing off", flush=True)
+            try:
+                await asyncio.wait_for(self._tapo_wake.wait(), timeout=self._tapo_next_poll_delay())
+            except asyncio.TimeoutError:
+                pass
+            self._tapo_wake.clear()
+
+    def _wake_tapo_poller(self):
+        if self._tapo_wake is not None:
+            self._tapo_wake.set()
+
+    def _tapo_mark_failed(self, entry):
+        entry["device"] = None
+        entry["is_on"] = None
+        entry["failures"] += 1
+        entry["retry_at"] = time.monotonic() + self._tapo_backoff_delay(entry["failures"])
+        if entry["failures"] == 1:
+            print(f"[Light] Lost connection to {entry['ip']}", flush=True)
+
+    async def _tapo_connect(self, entry, force=False):
+        """Returns the cached device for entry, reconnecting it (with its own backoff) if needed."""
+        if entry["device"]: return entry["device"]
+        if not force and time.monotonic() < entry["retry_at"]: return None
         try:
-            dev = await Discover.discover_single(
-                self.TAPO_IP, 
-                username=self.TAPO_EMAIL, 
-                password=self.TAPO_PASSWORD
+            dev = await asyncio.wait_for(
+                Discover.discover_single(entry["ip"], username=entry["email"], password=entry["password"]),
+                timeout=self.TAPO_DEVICE_TIMEOUT
             )
-            await dev.update()
-            self._bulb_device = dev
+            await asyncio.wait_for(dev.update(), timeout=self.TAPO_DEVICE_TIMEOUT)
+            entry["device"] = dev
+            entry["failures"] = 0
             return dev
-        except: return None
+        except Exception:
+            self._tapo_mark_failed(entry)
+            return None
 
-    async def _async_tapo_toggle(self):
-        bulb = await self._get_bulb()
-        if not bulb: return
-        try:
-            await bulb.update()
-            if bulb.is_on:
-                await bulb.turn_off()
-                self._light_is_on = False
-            else:
-                await bulb.turn_on()
-                self._light_is_on = True
+    def _tapo_entry_lock(self, entry):
+        # Created lazily so it belongs to tapo_loop (only touched from that thread).
+        if entry["lock"] is None:
+            entry["lock"] = asyncio.Lock()
+        return entry["lock"]
+
+    def _publish_light_state(self):
+        states = [e["is_on"] for e in self._tapo_devices if e["is_on"] is not None]
+        if not states:
+            return
+        is_on = any(states)
+        if self._light_is_on != is_on:
+            self._light_is_on = is_on
             self.lightStateChanged.emit()
-        except: self._bulb_device = None
+
+    async def _tapo_refresh_device(self, entry):
+        async with self._tapo_entry_lock(entry):
+            dev = await self._tapo_connect(entry)
+            if not dev: return False
+            try:
+                await asyncio.wait_for(dev.update(), timeout=self.TAPO_DEVICE_TIMEOUT)
+                entry["is_on"] = bool(dev.is_on)
+                ok = True
+            except Exception:
+                self._tapo_mark_failed(entry)
+                ok = False
+        # Publish per device so a slow bulb doesn't delay the others' state.
+        self._publish_light_state()
+        return ok
+
+    async def _tapo_set_device(self, entry, turn_on):
+        async with self._tapo_entry_lock(entry):
+            dev = await self._tapo_connect(entry, force=True)
+            if not dev: return False
+            try:
+                await asyncio.wait_for(dev.turn_on() if turn_on else dev.turn_off(), timeout=self.TAPO_DEVICE_TIMEOUT)
+                entry["is_on"] = turn_on
+                ok = True
+            except Exception:
+                self._tapo_mark_failed(entry)
+                ok = False
+        self._publish_light_state()
+        return ok
+
+    async def _async_tapo_toggle(self, turn_on):
+        results = await asyncio.gather(*(self._tapo_set_device(e, turn_on) for e in self._tapo_devices))
+        if any(results):
+            self._tapo_failures = 0
+        self._wake_tapo_poller()
 
     async def _async_tapo_status(self):
-        bulb = await self._get_bulb()
-        if not bulb: return
-        try:
-            await bulb.update()
-            if self._light_is_on != bulb.is_on:
-                self._light_is_on = bulb.is_on
-                self.lightStateChanged.emit()
-        except: self._bulb_device = None
+        results = await asyncio.gather(*(self._tapo_refresh_device(e) for e in self._tapo_devices))
+        return any(results)
 
     # --- LOCATION & WEATHER ---
     def _detect_location(self):
@@ -371,6 +724,7 @@ class SmartClockBackend(QObject):
         self._spotify_track = "Nothing Playing"
         self._spotify_artist = "Spotify"
         self._spotify_album_art = ""
+        self._spotify_album_art_source = ""
         self._spotify_is_playing = False
         self._spotify_device_name = "No Device"
         self._spotify_volume = 0
@@ -391,6 +745,50 @@ class SmartClockBackend(QObject):
         }
         return f"https://accounts.spotify.com/authorize?{urlencode(params)}"
 
+    def _pooled_session(self, adapter):
+        """Per-thread requests.Session mounted on a shared connection pool."""
+        sessions = getattr(self._http_sessions, "sessions", None)
+        if sessions is None:
+            sessions = self._http_sessions.sessions = {}
+        session = sessions.get(id(adapter))
+        if session is None:
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            sessions[id(adapter)] = session
+        return session
+
+    def _spotify_http(self, method, url, **kwargs):
+        """All Spotify traffic (API and accounts) goes through the pooled session."""
+        started = time.perf_counter()
+        try:
+            return self._pooled_session(self._spotify_adapter).request(method, url, **kwargs)
+        except Exception:
+            with self._spotify_http_stats_lock:
+                self._spotify_http_stats["errors"] += 1
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with self._spotify_http_stats_lock:
+                stats = self._spotify_http_stats
+                stats["requests"] += 1
+                stats["total_ms"] += elapsed_ms
+                stats["avg_ms"] = round(stats["total_ms"] / stats["requests"], 1)
+
+    @Slot(result="QVariantMap")
+    def spotifyHttpStats(self):
+        with self._spotify_http_stats_lock:
+            stats = dict(self._spotify_http_stats)
+        # Connections opened vs requests sent shows how often keep-alive saved a handshake.
+        connections = 0
+        for pool_key in list(self._spotify_adapter.poolmanager.pools.keys()):
+            pool = self._spotify_adapter.poolmanager.pools.get(pool_key)
+            if pool is not None:
+                connections += pool.num_connections
+        stats["connections_opened"] = connections
+        stats["total_ms"] = round(stats["total_ms"], 1)
+        return stats
+
     def _spotify_ensure_access_token(self):
         if self._spotify_access_token and time.time() < (self._spotify_expires_at - 60):
             return True
@@ -405,7 +803,8 @@ class SmartClockBackend(QObject):
                 self._spotify_set_disconnected("Spotify auth required")
                 return False
             try:
-                response = requests.post(
+                response = self._spotify_http(
+                    "POST",
                     "https://accounts.spotify.com/api/token",
                     data={
                         "grant_type": "refresh_token",
@@ -438,7 +837,7 @@ class SmartClockBackend(QObject):
             "Pragma": "no-cache"
         }
         try:
-            response = requests.request(
+            response = self._spotify_http(
                 method,
                 f"https://api.spotify.com{endpoint}",
                 headers=headers,
@@ -515,7 +914,8 @@ class SmartClockBackend(QObject):
             return
 
         try:
-            token_response = requests.post(
+            token_response = self._spotify_http(
+                "POST",
                 "https://accounts.spotify.com/api/token",
                 data={
                     "grant_type": "authorization_code",
@@ -554,11 +954,43 @@ class SmartClockBackend(QObject):
         try:
             self._spotify_poll_count += 1
             self._spotify_fetch_playback()
-            if self._spotify_poll_count % 5 == 0:
+            if time.monotonic() - self._spotify_devices_fetched_at >= self.SPOTIFY_DEVICES_REFRESH_SECONDS:
                 self._spotify_fetch_devices()
         finally:
             with self._spotify_poll_lock:
                 self._spotify_poll_inflight = False
+            self._spotifyPollFinished.emit(self._spotify_next_poll_delay_ms())
+
+    def _spotify_next_poll_delay_ms(self):
+        """Plans the next poll from the last playback state instead of a fixed 2 s."""
+        if time.monotonic() < self._spotify_fast_until:
+            return self.SPOTIFY_FAST_POLL_MS
+        if not self._screen_is_on:
+            return self.SPOTIFY_SCREEN_OFF_POLL_MS
+        if self._is_night_mode:
+            return self.SPOTIFY_NIGHT_POLL_MS
+        if self._spotify_status != "Connected":
+            return self.SPOTIFY_ERROR_POLL_MS
+        if not self._spotify_is_playing:
+            if self._spotify_duration_ms:
+                return self.SPOTIFY_PAUSED_POLL_MS
+            return self.SPOTIFY_IDLE_POLL_MS
+        if self._spotify_duration_ms:
+            # Land just after the current track ends so the next one shows promptly.
+            elapsed_ms = int((time.monotonic() - self._spotify_progress_at) * 1000)
+            remaining_ms = self._spotify_duration_ms - self._spotify_progress_ms - elapsed_ms
+            return max(self.SPOTIFY_FAST_POLL_MS, min(remaining_ms + 750, self.SPOTIFY_PLAYING_MAX_POLL_MS))
+        return self.SPOTIFY_PLAYING_MAX_POLL_MS
+
+    def _arm_spotify_timer(self, delay_ms):
+        # A user action may already have armed a sooner poll; keep that one.
+        if self._spotify_timer.isActive() and self._spotify_timer.remainingTime() <= delay_ms:
+            return
+        self._spotify_timer.start(max(250, delay_ms))
+
+    def _spotify_note_user_action(self):
+        self._spotify_fast_until = time.monotonic() + self.SPOTIFY_FAST_WINDOW_SECONDS
+        self._arm_spotify_timer(self.SPOTIFY_FAST_POLL_MS)
 
     def _spotify_fetch_playback(self):
         response = self._spotify_request("GET", "/v1/me/player")
@@ -568,8 +1000,11 @@ class SmartClockBackend(QObject):
             self._spotify_track = "Nothing Playing"
             self._spotify_artist = "Spotify"
             self._spotify_album_art = ""
+            self._spotify_album_art_source = ""
             self._spotify_is_playing = False
             self._spotify_device_name = "No Active Device"
+            self._spotify_progress_ms = 0
+            self._spotify_duration_ms = 0
             self._spotify_set_status("Connected")
             self.spotifyChanged.emit()
             return
@@ -585,14 +1020,35 @@ class SmartClockBackend(QObject):
         device = payload.get("device") or {}
         self._spotify_track = item.get("name", "Nothing Playing")
         self._spotify_artist = ", ".join([a.get("name", "") for a in artists if a.get("name")]) or "Spotify"
-        self._spotify_album_art = images[0].get("url", "") if images else ""
+        art_source = self._album_art_pick_url(images)
+        if art_source != self._spotify_album_art_source:
+            self._spotify_album_art_source = art_source
+            # A miss shows Spotify's URL straight away and swaps in the cached
+            # copy once it's on disk, so the poll never waits on a download.
+            cached = self._album_art_cached_url(art_source) if art_source else None
+            self._spotify_album_art = cached or art_source
+            if art_source and not cached:
+                threading.Thread(target=self._album_art_swap_in, args=(art_source,), daemon=True).start()
+        track_id = item.get("id") or ""
+        if track_id and track_id != self._spotify_track_id:
+            self._spotify_track_id = track_id
+            threading.Thread(target=self._album_art_prefetch_next, daemon=True).start()
         self._spotify_is_playing = bool(payload.get("is_playing"))
         self._spotify_device_name = device.get("name", "No Active Device")
-        self._spotify_volume = int(device.get("volume_percent", self._spotify_volume or 0))
+        with self._spotify_command_cond:
+            hold_volume = self._spotify_volume_hold
+        if not hold_volume:
+            self._spotify_volume = int(device.get("volume_percent", self._spotify_volume or 0))
+        self._spotify_progress_ms = int(payload.get("progress_ms") or 0)
+        self._spotify_duration_ms = int(item.get("duration_ms") or 0)
+        self._spotify_progress_at = time.monotonic()
         self._spotify_set_status("Connected")
         self.spotifyChanged.emit()
 
     def _spotify_fetch_devices(self):
+        # Stamped before the request so a failing endpoint is also retried at
+        # most once per SPOTIFY_DEVICES_REFRESH_SECONDS.
+        self._spotify_devices_fetched_at = time.monotonic()
         response = self._spotify_request("GET", "/v1/me/player/devices")
         if response is None or response.status_code != 200:
             self._spotify_set_status("Cannot load Spotify devices")
@@ -613,14 +1069,50 @@ class SmartClockBackend(QObject):
         self._spotify_set_status("Connected")
         self.spotifyChanged.emit()
 
-    def _spotify_control(self, method, endpoint, params=None, json_body=None):
-        threading.Thread(
-            target=self._spotify_control_worker,
-            args=(method, endpoint, params, json_body),
-            daemon=True
-        ).start()
+    def _spotify_control(self, method, endpoint, params=None, json_body=None, coalesce_key=None):
+        self._spotify_note_user_action()
+        with self._spotify_command_cond:
+            if coalesce_key is None:
+                self._spotify_command_seq += 1
+                coalesce_key = ("seq", self._spotify_command_seq)
+            # Re-assigning an existing key keeps its queue position but sends only the latest value.
+            self._spotify_commands[coalesce_key] = (method, endpoint, params, json_body)
+            self._spotify_last_command_at = time.monotonic()
+            if coalesce_key == "volume":
+                self._spotify_volume_hold = True
+            self._spotify_command_cond.notify()
+
+    def _spotify_command_worker(self):
+        refresh_pending = False
+        while True:
+            with self._spotify_command_cond:
+                while not self._spotify_commands:
+                    if not refresh_pending:
+                        self._spotify_command_cond.wait()
+                        continue
+                    quiet_left = self._spotify_last_command_at + self.SPOTIFY_COMMAND_QUIET_SECONDS - time.monotonic()
+                    if quiet_left <= 0:
+                        break
+                    self._spotify_command_cond.wait(quiet_left)
+                if self._spotify_commands:
+                    key, command = self._spotify_commands.popitem(last=False)
+                else:
+                    # The burst is over: Spotify's volume is authoritative again.
+                    key, command = None, None
+                    self._spotify_volume_hold = False
+            if command is None:
+                # One follow-up refresh for the whole burst of commands.
+                refresh_pending = False
+                self._spotify_fetch_playback()
+                if self._spotify_refresh_devices_after:
+                    self._spotify_fetch_devices()
+                self._spotify_refresh_devices_after = False
+                continue
+            self._spotify_run_command(*command)
+            self._spotify_refresh_devices_after = self._spotify_refresh_devices_after or key == "transfer"
+            refresh_pending = True
 
-    def _spotify_control_worker(self, method, endpoint, params, json_body):
+    def _spotify_run_command(self, method, endpoint, params, json_body):
         response = self._spotify_request(method, endpoint, params=params, json_body=json_body)
         if response is not None and response.status_code in [200, 202, 204]:
             self._spotify_set_status("Connected")
@@ -630,8 +1122,6 @@ class SmartClockBackend(QObject):
             self._spotify_set_status("Spotify Premium required")
         elif response is not None:
             self._spotify_set_status("Spotify action failed")
-        self._spotify_fetch_playback()
-        self._spotify_fetch_devices()
 
     @Property(bool, notify=spotifyChanged)
     def spotifyConnected(self):
@@ -660,6 +1150,7 @@ class SmartClockBackend(QObject):
 
     @Slot()
     def spotifyRefresh(self):
+        self._spotify_note_user_action()
         threading.Thread(target=self._spotify_fetch_playback, daemon=True).start()
         threading.Thread(target=self._spotify_fetch_devices, daemon=True).start()
 
@@ -667,7 +1158,9 @@ class SmartClockBackend(QObject):
     def spotifyTogglePlayPause(self):
         endpoint = "/v1/me/player/pause" if self._spotify_is_playing else "/v1/me/player/play"
         params = {"device_id": self._spotify_selected_device_id} if self._spotify_selected_device_id else None
-        self._spotify_control("PUT", endpoint, params=params)
+        self._spotify_is_playing = not self._spotify_is_playing
+        self.spotifyChanged.emit()
+        self._spotify_control("PUT", endpoint, params=params, coalesce_key="playpause")
 
     @Slot()
     def spotifyNextTrack(self):
@@ -687,15 +1180,145 @@ class SmartClockBackend(QObject):
         params = {"volume_percent": safe_volume}
         if self._spotify_selected_device_id:
             params["device_id"] = self._spotify_selected_device_id
-        self._spotify_control("PUT", "/v1/me/player/volume", params=params)
+        self._spotify_control("PUT", "/v1/me/player/volume", params=params, coalesce_key="volume")
 
     @Slot(str)
     def spotifySetDevice(self, device_id):
         if not device_id:
             return
         self._spotify_selected_device_id = device_id
+        for dev in self._spotify_devices:
+            dev["is_active"] = dev["id"] == device_id
+            if dev["is_active"]:
+                self._spotify_device_name = dev["name"]
         self.spotifyChanged.emit()
-        self._spotify_control("PUT", "/v1/me/player", json_body={"device_ids": [device_id], "play": self._spotify_is_playing})
+        self._spotify_control("PUT", "/v1/me/player", json_body={"device_ids": [device_id], "play": self._spotify_is_playing}, coalesce_key="transfer")
+
+    # --- ALBUM ART CACHE ---
+    def _load_album_art_index(self):
+        """Filename -> size, oldest use first (file mtime records the last use)."""
+        index = OrderedDict()
+        try:
+            files = [(f.stat().st_mtime, f.name, f.stat().st_size) for f in self.album_art_cache_path.glob("*.jpg")]
+        except Exception:
+            return index
+        for _mtime, name, size in sorted(files):
+            index[name] = size
+        return index
+
+    def _album_art_pick_url(self, images):
+        """Smallest Spotify rendition that still covers ALBUM_ART_SIZE, else the largest."""
+        sized = [img for img in images if img.get("url")]
+        if not sized:
+            return ""
+        sized.sort(key=lambda img: img.get("width") or 0)
+        for img in sized:
+            if (img.get("width") or 0) >= self.ALBUM_ART_SIZE:
+                return img["url"]
+        return sized[-1]["url"]
+
+    def _album_art_cache_file(self, image_url):
+        name = f"{hashlib.sha256(image_url.encode('utf-8')).hexdigest()[:32]}.jpg"
+        return name, self.album_art_cache_path / name
+
+    def _album_art_cached_url(self, image_url):
+        """File URL of image_url if it is already cached (and marks it used), else None."""
+        name, path = self._album_art_cache_file(image_url)
+        with self._album_art_lock:
+            if name not in self._album_art_index or not path.exists():
+                return None
+            self._album_art_index.move_to_end(name)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return QUrl.fromLocalFile(str(path)).toString()
+
+    def _album_art_local_url(self, image_url):
+        """
+        Returns a file URL for image_url, downloading and downscaling it on a
+        miss, or None if that fails. Concurrent callers for the same image
+        (track change and next-track prefetch) share one download.
+        """
+        cached = self._album_art_cached_url(image_url)
+        if cached:
+            return cached
+        name, path = self._album_art_cache_file(image_url)
+        with self._album_art_lock:
+            pending = self._album_art_downloads.get(name)
+            owner = pending is None
+            if owner:
+                pending = self._album_art_downloads[name] = threading.Event()
+        if not owner:
+            pending.wait(15)
+            return self._album_art_cached_url(image_url)
+        try:
+            return self._album_art_download(image_url, name, path)
+        finally:
+            with self._album_art_lock:
+                self._album_art_downloads.pop(name, None)
+            pending.set()
+
+    def _album_art_download(self, image_url, name, path):
+        tmp_path = path.with_name(f"{name}.{threading.get_ident()}.tmp")
+        try:
+            response = self._spotify_http("GET", image_url, timeout=10)
+            if response.status_code != 200:
+                return None
+            image = QImage.fromData(response.content)
+            if image.isNull():
+                return None
+            if max(image.width(), image.height()) > self.ALBUM_ART_SIZE:
+                image = image.scaled(self.ALBUM_ART_SIZE, self.ALBUM_ART_SIZE, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+            if not image.save(str(tmp_path), "JPG", 85):
+                return None
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"[Spotify] Album art cache error: {e}", flush=True)
+            return None
+        finally:
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+        with self._album_art_lock:
+            self._album_art_index[name] = path.stat().st_size
+            self._album_art_index.move_to_end(name)
+            self._evict_album_art()
+        return QUrl.fromLocalFile(str(path)).toString()
+
+    def _album_art_swap_in(self, image_url):
+        local_url = self._album_art_local_url(image_url)
+        if local_url and self._spotify_album_art_source == image_url:
+            self._spotify_album_art = local_url
+            self.spotifyChanged.emit()
+
+    def _evict_album_art(self):
+        # Caller holds _album_art_lock.
+        total = sum(self._album_art_index.values())
+        while total > self.ALBUM_ART_CACHE_BYTES and len(self._album_art_index) > 1:
+            name, size = self._album_art_index.popitem(last=False)
+            total -= size
+            try:
+                (self.album_art_cache_path / name).unlink()
+            except OSError:
+                pass
+
+    def _album_art_prefetch_next(self):
+        response = self._spotify_request("GET", "/v1/me/player/queue")
+        if response is None or response.status_code != 200:
+            return
+        try:
+            queue = response.json().get("queue") or []
+        except Exception:
+            return
+        if not queue:
+            return
+        next_item = queue[0] or {}
+        images = (next_item.get("album") or {}).get("images") or next_item.get("images") or []
+        art_url = self._album_art_pick_url(images)
+        if art_url:
+            self._album_art_local_url(art_url)
 
     # --- CALENDAR ---
     def _refresh_calendar(self):
@@ -705,64 +1328,463 @@ class SmartClockBackend(QObject):
 
     def _worker_fetch_calendars(self):
         try:
-            events = []
             now = datetime.now().astimezone()
-            if self.cal_path.exists():
-                for file in os.listdir(self.cal_path):
-                    if file.lower().endswith(".ics"):
-                        try:
-                            with open(self.cal_path / file, 'rb') as f: self._parse_ical_data(f.read(), events, now)
-                        except: pass
+            changed = self._refresh_local_calendars(now)
             urls = self._load_url_links(self.cal_links_file, self.cal_links_legacy_file)
-            for url in urls:
-                try:
-                    r = requests.get(url, timeout=5)
-                    if r.status_code == 200: self._parse_ical_data(r.content, events, now)
-                except: pass
+            due = [url for url in urls if time.monotonic() >= self._calendar_feeds.get(url, {}).get("next_fetch_at", 0)]
+            if due:
+                with ThreadPoolExecutor(max_workers=min(self.CALENDAR_FETCH_WORKERS, len(due))) as pool:
+                    changed = any(list(pool.map(lambda url: self._fetch_calendar_feed(url, now), due))) or changed
+            for url in list(self._calendar_feeds):
+                if url not in urls:
+                    del self._calendar_feeds[url]
+                    changed = True
+
+            day_rolled = now.date() != self._calendar_labels_date
+            if not changed and not day_rolled:
+                return
+            cutoff = now - timedelta(days=self.CALENDAR_PAST_DAYS)
+            events = []
+            for source in list(self._calendar_files.values()) + [self._calendar_feeds[url] for url in urls if url in self._calendar_feeds]:
+                events.extend(e for e in self._calendar_source_events(source, now) if e["sort_date"] >= cutoff)
+            if day_rolled:
+                # Parsed events are reused across days; only the labels need redoing.
+                for event in events:
+                    event["date"] = self._calendar_date_label(event["sort_date"], now)
+                self._calendar_labels_date = now.date()
             events.sort(key=lambda x: x['sort_date'])
+            day_index = {}
+            for event in events:
+                day_index.setdefault(event["sort_date"].astimezone().date().isoformat(), []).append(event)
             self._calendar_events = events 
+            self._calendar_day_index = day_index
+            self._calendar_revision += 1
             self.calendarChanged.emit()
+            if changed:
+                self._save_calendar_cache()
         finally: self._is_fetching_calendar = False
 
-    def _parse_ical_data(self, content, events_list, now):
+    def _refresh_local_calendars(self, now):
+        """Re-parses only .ics files whose mtime/size changed. Returns True if anything changed."""
+        changed = False
+        seen = set()
+        if self.cal_path.exists():
+            for file in os.listdir(self.cal_path):
+                if not file.lower().endswith(".ics"):
+                    continue
+                path = self.cal_path / file
+                try:
+                    st = path.stat()
+                except OSError:
+                    continue
+                key = str(path)
+                seen.add(key)
+                stamp = [st.st_mtime_ns, st.st_size]
+                cached = self._calendar_files.get(key)
+                if cached and cached["stamp"] == stamp:
+                    continue
+                file_events, recurring = [], []
+                try:
+                    with open(path, 'rb') as f: self._parse_ical_data(self._read_chunks(f), file_events, now, recurring)
+                except: pass
+                self._calendar_files[key] = {"stamp": stamp, "events": file_events, "recurring": recurring}
+                changed = True
+        for key in list(self._calendar_files):
+            if key not in seen:
+                del self._calendar_files[key]
+                changed = True
+        return changed
+
+    def _fetch_calendar_feed(self, url, now):
+        """
+        Conditional GET for one feed. On 304, or a 200 with unchanged content,
+        the previously parsed events are kept. Returns True if events changed.
+        """
+        state = self._calendar_feeds.setdefault(url, {"etag": None, "last_modified": None, "digest": None, "events": [], "recurring": [], "next_fetch_at": 0})
+        headers = {}
+        if state["etag"]: headers["If-None-Match"] = state["etag"]
+        if state["last_modified"]: headers["If-Modified-Since"] = state["last_modified"]
+        # The body is hashed while it streams into a spool file (RAM for small
+        # feeds, disk beyond CALENDAR_SPOOL_BYTES) and only parsed if it changed.
+        spool = tempfile.SpooledTemporaryFile(max_size=self.CALENDAR_SPOOL_BYTES)
         try:
-            gcal = Calendar.from_ical(content)
-            for component in gcal.walk():
-                if component.name == "VEVENT":
-                    summary = str(component.get('summary', 'No Title'))
-                    location = str(component.get('location', '')) if component.get('location') else ""
-                    description = str(component.get('description', '')) if component.get('description') else ""
-                    if component.get('dtstart'):
-                        dtstart = component.get('dtstart').dt
-                        if isinstance(dtstart, date) and not isinstance(dtstart, datetime):
-                            dtstart = datetime.combine(dtstart, datetime.min.time()).astimezone()
-                        if dtstart.tzinfo is None: dtstart = dtstart.astimezone()
-                        if dtstart >= now - timedelta(days=60):
-                            if dtstart.date() == now.date(): date_str = f"Today, {dtstart.strftime('%H:%M')}"
-                            elif dtstart.date() == (now + timedelta(days=1)).date(): date_str = f"Tomorrow, {dtstart.strftime('%H:%M')}"
-                            else: date_str = dtstart.strftime("%a %d %b, %H:%M")
-                            events_list.append({"title": summary, "date": date_str, "date_iso": dtstart.isoformat(), "sort_date": dtstart, "location": location, "description": description})
-        except: pass
+            with self._pooled_session(self._calendar_adapter).get(url, headers=headers, timeout=(5, 20), stream=True) as r:
+                hasher = hashlib.sha256()
+                if r.status_code == 200:
+                    for chunk in r.iter_content(self.CALENDAR_READ_CHUNK_BYTES):
+                        hasher.update(chunk)
+                        spool.write(chunk)
+        except Exception as e:
+            spool.close()
+            print(f"[Calendar] Feed fetch failed: {e}", flush=True)
+            state["next_fetch_at"] = time.monotonic() + self.CALENDAR_FEED_RETRY_SECONDS
+            return False
+        changed = False
+        with spool:
+            if r.status_code == 200:
+                state["etag"] = r.headers.get("ETag")
+                state["last_modified"] = r.headers.get("Last-Modified")
+                digest = hasher.hexdigest()
+                if digest != state["digest"]:
+                    feed_events, recurring = [], []
+                    spool.seek(0)
+                    self._parse_ical_data(self._read_chunks(spool), feed_events, now, recurring)
+                    state["events"] = feed_events
+                    state["recurring"] = recurring
+                    state.pop("expanded_window", None)
+                    state["digest"] = digest
+                    changed = True
+            elif r.status_code != 304:
+                state["next_fetch_at"] = time.monotonic() + self.CALENDAR_FEED_RETRY_SECONDS
+                return False
+        state["next_fetch_at"] = time.monotonic() + self._calendar_feed_interval(r)
+        return changed
+
+    def _load_calendar_cache(self):
+        """Restores parsed events from disk so a restart doesn't reparse every source."""
+        if not self.cal_cache_file.exists():
+            return
+        try:
+            with open(self.cal_cache_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            def restore(events):
+                for event in events:
+                    event["sort_date"] = datetime.fromisoformat(event["date_iso"])
+                    event["date"] = ""
+                return events
+            for key, entry in data.get("files", {}).items():
+                self._calendar_files[key] = {"stamp": entry["stamp"], "events": restore(entry["events"]), "recurring": entry.get("recurring", [])}
+            for url, entry in data.get("feeds", {}).items():
+                self._calendar_feeds[url] = {
+                    "etag": entry.get("etag"),
+                    "last_modified": entry.get("last_modified"),
+                    "digest": entry.get("digest"),
+                    "events": restore(entry["events"]),
+                    "recurring": entry.get("recurring", []),
+                    "next_fetch_at": 0
+                }
+        except Exception as e:
+            print(f"[Calendar] Failed to load calendar cache: {e}", flush=True)
+            self._calendar_files = {}
+            self._calendar_feeds = {}
+
+    def _save_calendar_cache(self):
+        def dump(events):
+            return [{k: v for k, v in e.items() if k not in ("sort_date", "date")} for e in events]
+        payload = {
+            "files": {
+                key: {"stamp": entry["stamp"], "events": dump(entry["events"]), "recurring": entry["recurring"]}
+                for key, entry in list(self._calendar_files.items())
+            },
+            "feeds": {
+                url: {"etag": entry["etag"], "last_modified": entry["last_modified"], "digest": entry["digest"], "events": dump(entry["events"]), "recurring": entry["recurring"]}
+                for url, entry in list(self._calendar_feeds.items())
+            }
+        }
+        try:
+            tmp_path = self.cal_cache_file.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(payload, f)
+            os.replace(tmp_path, self.cal_cache_file)
+        except Exception as e:
+            print(f"[Calendar] Failed to save calendar cache: {e}", flush=True)
+
+    def _calendar_feed_interval(self, response):
+        # Honour a longer Cache-Control max-age from the server, within limits.
+        interval = self.CALENDAR_FEED_REFRESH_SECONDS
+        match = re.search(r"max-age=(\d+)", response.headers.get("Cache-Control", ""))
+        if match:
+            interval = max(interval, min(int(match.group(1)), self.CALENDAR_FEED_MAX_REFRESH_SECONDS))
+        return interval
+
+    def _calendar_date_label(self, dtstart, now):
+        if dtstart.date() == now.date(): return f"Today, {dtstart.strftime('%H:%M')}"
+        if dtstart.date() == (now + timedelta(days=1)).date(): return f"Tomorrow, {dtstart.strftime('%H:%M')}"
+        return dtstart.strftime("%a %d %b, %H:%M")
+
+    def _calendar_event(self, summary, dtstart, location, description, now):
+        return {"title": summary, "date": self._calendar_date_label(dtstart, now), "date_iso": dtstart.isoformat(), "sort_date": dtstart, "location": location, "description": description}
+
+    def _iter_ical_lines(self, chunks):
+        """Yields raw (still folded) content lines from an iterable of byte chunks."""
+        pending = b""
+        for chunk in chunks:
+            pending += chunk
+            lines = pending.split(b"\n")
+            pending = lines.pop()
+            for line in lines:
+                yield line.rstrip(b"\r")
+        if pending:
+            yield pending.rstrip(b"\r")
+
+    def _iter_ical_blocks(self, chunks):
+        """
+        Splits an iCalendar stream into top-level VEVENT/VTIMEZONE blocks, each a
+        list of raw lines, so only one component is ever held in memory.
+        """
+        block, end_marker = None, None
+        for line in self._iter_ical_lines(chunks):
+            if block is None:
+                upper = line.strip().upper()
+                if upper in (b"BEGIN:VEVENT", b"BEGIN:VTIMEZONE"):
+                    block, end_marker = [line], b"END:" + upper[6:]
+                continue
+            block.append(line)
+            if line.strip().upper() == end_marker:
+                yield end_marker[4:].decode(), block
+                block = None
+
+    def _ical_block_props(self, block):
+        """Unfolded top-level properties of a raw VEVENT block, without a full parse."""
+        props = {}
+        current = None
+        for line in block[1:]:
+            if line[:1] in (b" ", b"\t"):
+                if current is not None: props[current] += line[1:]
+                continue
+            match = self._ICAL_PROP_RE.match(line)
+            if not match:
+                current = None
+                continue
+            name = match.group(1).upper()
+            if name in (b"BEGIN", b"END"):
+                # Nested VALARM etc.; the event's own properties come first.
+                break
+            current = name if name not in props else None
+            if current is not None: props[name] = match.group(2)
+        return props
+
+    def _ical_block_wanted(self, block, cutoff_day):
+        """Cheap DTSTART window check; anything recurring or unclear is kept for a full parse."""
+        props = self._ical_block_props(block)
+        if b"DTSTART" not in props: return False
+        if b"RRULE" in props or b"RDATE" in props or b"RECURRENCE-ID" in props: return True
+        value = props[b"DTSTART"].rsplit(b":", 1)[-1].strip()
+        try:
+            return date(int(value[0:4]), int(value[4:6]), int(value[6:8])) >= cutoff_day
+        except ValueError:
+            return True
+
+    def _read_chunks(self, f):
+        return iter(lambda: f.read(self.CALENDAR_READ_CHUNK_BYTES), b"")
+
+    def _parse_ical_data(self, chunks, events_list, now, recurring_list=None):
+        """
+        Appends single events to events_list. Events with RRULE/RDATE are
+        turned into recurrence specs (recurring_list) and expanded lazily.
+        The feed is consumed as a stream of byte chunks; VEVENTs that start
+        before the window are dropped before icalendar ever parses them.
+        """
+        # A day of slack so a UTC DTSTART near the cutoff isn't dropped early.
+        cutoff_day = (now - timedelta(days=self.CALENDAR_PAST_DAYS)).date() - timedelta(days=1)
+        vevents = []
+        skipped = 0
+        for kind, block in self._iter_ical_blocks(chunks):
+            if kind == "VEVENT" and not self._ical_block_wanted(block, cutoff_day):
+                skipped += 1
+                continue
+            try:
+                # Parsing a VTIMEZONE registers it with icalendar, so later
+                # events referencing its TZID resolve even when parsed alone.
+                component = Calendar.from_ical(b"\r\n".join(block) + b"\r\n")
+            except Exception:
+                continue
+            if kind == "VEVENT" and component.get('dtstart'):
+                vevents.append(component)
+        if skipped:
+            print(f"[Calendar] Skipped {skipped} out-of-window event(s) without parsing", flush=True)
+        # Instances moved/edited individually carry a RECURRENCE-ID; the
+        # master must not also produce them at their original time.
+        overrides = {}
+        for component in vevents:
+            if component.get('recurrence-id') and component.get('uid'):
+                overrides.setdefault(str(component.get('uid')), []).append(component.get('recurrence-id').dt)
+        for component in vevents:
+            try:
+                summary = str(component.get('summary', 'No Title'))
+                location = str(component.get('location', '')) if component.get('location') else ""
+                description = str(component.get('description', '')) if component.get('description') else ""
+                if recurring_list is not None and (component.get('rrule') or component.get('rdate')) and not component.get('recurrence-id'):
+                    spec = self._recurrence_spec(component, overrides.get(str(component.get('uid', '')), []))
+                    if spec:
+                        spec.update({"title": summary, "location": location, "description": description})
+                        recurring_list.append(spec)
+                        continue
+                dtstart = component.get('dtstart').dt
+                if isinstance(dtstart, date) and not isinstance(dtstart, datetime):
+                    dtstart = datetime.combine(dtstart, datetime.min.time()).astimezone()
+                if dtstart.tzinfo is None: dtstart = dtstart.astimezone()
+                if dtstart >= now - timedelta(days=self.CALENDAR_PAST_DAYS):
+                    events_list.append(self._calendar_event(summary, dtstart, location, description, now))
+            except Exception:
+                continue
+
+    def _recurrence_spec(self, component, override_ids):
+        """
+        Serialisable description of a recurring VEVENT. All times are stored as
+        naive wall-clock times in the event's own zone (tzid), so expansion stays
+        correct across DST changes and UNTIL/EXDATE never mix naive and aware values.
+        """
+        try:
+            start = component.get('dtstart').dt
+            all_day = not isinstance(start, datetime)
+            tzid = ""
+            if all_day:
+                start = datetime.combine(start, datetime.min.time())
+            elif start.tzinfo is not None:
+                key = getattr(start.tzinfo, "key", None) or getattr(start.tzinfo, "zone", None)
+                try:
+                    tz = ZoneInfo(key) if key else None
+                except Exception:
+                    tz = None
+                if tz is not None:
+                    tzid = key
+                    start = start.astimezone(tz).replace(tzinfo=None)
+                else:
+                    start = start.astimezone().replace(tzinfo=None)
+            zone = ZoneInfo(tzid) if tzid else None
+
+            def to_wall(value, end_of_day=False):
+                if isinstance(value, datetime):
+                    if value.tzinfo is None:
+                        return value
+                    return value.astimezone(zone).replace(tzinfo=None) if zone else value.astimezone().replace(tzinfo=None)
+                return datetime.combine(value, datetime.max.time().replace(microsecond=0) if end_of_day else start.time())
+
+            rules = component.get('rrule') or []
+            if not isinstance(rules, list): rules = [rules]
+            rrules = []
+            for rule in rules:
+                rule = rule.copy()
+                until = rule.pop('UNTIL', None)
+                text = rule.to_ical().decode()
+                if until:
+                    text += f";UNTIL={to_wall(until[0], end_of_day=True).strftime('%Y%m%dT%H%M%S')}"
+                rrules.append(text)
+
+            def collect(prop):
+                values = component.get(prop) or []
+                if not isinstance(values, list): values = [values]
+                out = []
+                for value in values:
+                    for item in getattr(value, "dts", []):
+                        if isinstance(item.dt, (datetime, date)):
+                            out.append(to_wall(item.dt).isoformat())
+                return out
+
+            exdates = collect('exdate') + [to_wall(dt).isoformat() for dt in override_ids]
+            return {"dtstart": start.isoformat(), "tzid": tzid, "all_day": all_day, "rrules": rrules, "rdates": collect('rdate'), "exdates": exdates}
+        except Exception as e:
+            print(f"[Calendar] Skipping unparseable recurrence: {e}", flush=True)
+            return None
+
+    def _iter_occurrences(self, spec, window_start, window_end):
+        """Lazily yields aware occurrence datetimes of spec inside the window."""
+        zone = ZoneInfo(spec["tzid"]) if spec["tzid"] else None
+        start = datetime.fromisoformat(spec["dtstart"])
+        rset = rruleset()
+        for text in spec["rrules"]:
+            rset.rrule(rrulestr(text, dtstart=start))
+        rset.rdate(start)
+        for iso in spec["rdates"]:
+            rset.rdate(datetime.fromisoformat(iso))
+        for iso in spec["exdates"]:
+            rset.exdate(datetime.fromisoformat(iso))
+
+        def wall(dt):
+            return dt.astimezone(zone).replace(tzinfo=None) if zone else dt.astimezone().replace(tzinfo=None)
+
+        wall_end = wall(window_end)
+        count = 0
+        for occurrence in rset.xafter(wall(window_start), inc=True):
+            if occurrence > wall_end or count >= self.CALENDAR_MAX_OCCURRENCES:
+                return
+            count += 1
+            yield occurrence.replace(tzinfo=zone) if zone else occurrence.astimezone()
+
+    def _calendar_source_events(self, source, now):
+        """Single events plus recurring instances, expanded once per source and day window."""
+        recurring = source.get("recurring") or []
+        if not recurring:
+            return source["events"]
+        window_key = now.date().isoformat()
+        if source.get("expanded_window") != window_key:
+            day_start = datetime.combine(now.date(), datetime.min.time()).astimezone()
+            window_start = day_start - timedelta(days=self.CALENDAR_PAST_DAYS)
+            window_end = day_start + timedelta(days=self.CALENDAR_LOOKAHEAD_DAYS)
+            expanded = []
+            for spec in recurring:
+                try:
+                    for occurrence in self._iter_occurrences(spec, window_start, window_end):
+                        expanded.append(self._calendar_event(spec["title"], occurrence, spec["location"], spec["description"], now))
+                except Exception as e:
+                    print(f"[Calendar] Recurrence expansion failed for {spec.get('title')!r}: {e}", flush=True)
+            source["expanded"] = expanded
+            source["expanded_window"] = window_key
+        return source["events"] + source["expanded"]
 
     @Property(list, notify=calendarChanged)
     def calendarEvents(self): return self._calendar_events
+    @Property(int, notify=calendarChanged)
+    def calendarRevision(self): return self._calendar_revision
+
+    @Slot(int, int, result="QVariantMap")
+    def calendarMonthIndex(self, year, month):
+        """Per-day summary (count + first three events) for the 42 cells of a month grid."""
+        first = date(year, month, 1)
+        grid_start = first - timedelta(days=first.weekday())
+        index = self._calendar_day_index
+        result = {}
+        for offset in range(42):
+            key = (grid_start + timedelta(days=offset)).isoformat()
+            day_events = index.get(key)
+            if day_events:
+                result[key] = {"count": len(day_events), "events": day_events[:3]}
+        return result
+
+    @Slot(str, result=list)
+    def calendarEventsForDate(self, iso_date):
+        return self._calendar_day_index.get(iso_date, [])
 
     @Property(list, notify=imagesChanged)
     def imageList(self):
         return self._image_urls
 
+    @Slot(str)
+    def reportImageShown(self, url):
+        """Called by the slideshow for each image it shows; feeds LRU eviction."""
+        path = Path(QUrl(url).toLocalFile())
+        name = None
+        if path.parent == self.image_cache_path:
+            name = path.name
+        elif path.parent == self.image_display_path and not path.name.startswith("local-"):
+            name = next((path.stem + ext for ext in (".jpg", ".jpeg", ".png", ".bmp", ".webp") if path.stem + ext in self._photo_catalog), None)
+        if name:
+            with self._photo_shown_lock:
+                self._photo_shown_pending[name] = int(time.time())
+
     def _load_local_images(self):
+        """Slideshow URLs, preferring the display-size derivative of each image when there is one."""
         image_urls = []
+        display = set(os.listdir(self.image_display_path)) if self.image_display_path.exists() else set()
         if self.image_source_path.exists():
             for file in os.listdir(self.image_source_path):
                 if file.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp', '.webp')):
-                    full_path = self.image_source_path / file
+                    name = self._display_name(file, local=True)
+                    full_path = self.image_display_path / name if name in display else self.image_source_path / file
                     image_urls.append(QUrl.fromLocalFile(str(full_path)).toString())
+        served = set()
         if self.image_cache_path.exists():
             for file in os.listdir(self.image_cache_path):
                 if file.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp', '.webp')):
-                    full_path = self.image_cache_path / file
+                    name = self._display_name(file)
+                    served.add(name)
+                    full_path = self.image_display_path / name if name in display else self.image_cache_path / file
                     image_urls.append(QUrl.fromLocalFile(str(full_path)).toString())
+        # Derivatives whose original was discarded (photo_keep_originals = false).
+        for name in display:
+            if name.endswith(".jpg") and not name.startswith("local-") and name not in served:
+                image_urls.append(QUrl.fromLocalFile(str(self.image_display_path / name)).toString())
         random.shuffle(image_urls)
         return image_urls
 
@@ -789,6 +1811,8 @@ class SmartClockBackend(QObject):
             urls = self._load_photo_links()
             if not urls:
                 print("[Photos] No remote photo links configured. Using local images only.", flush=True)
+                self._evict_photo_cache()
+                self._ingest_display_derivatives()
                 self._image_urls = self._load_local_images()
                 print(f"[Photos] Slideshow images available: {len(self._image_urls)}", flush=True)
                 self.imagesChanged.emit()
@@ -798,6 +1822,8 @@ class SmartClockBackend(QObject):
             removed_after = self._dedupe_cache_by_content()
             if removed_after:
                 print(f"[Photos] Removed {removed_after} duplicate cached image(s) after refresh.", flush=True)
+            self._evict_photo_cache()
+            self._ingest_display_derivatives()
             self._image_urls = self._load_local_images()
             if downloaded:
                 print(f"[Photos] Refresh complete. Downloaded {downloaded} new image(s). Total slideshow images: {len(self._image_urls)}", flush=True)
@@ -842,23 +1868,56 @@ class SmartClockBackend(QObject):
         return []
 
     def _extract_direct_image_urls(self, source_url):
+        """
+        Image URLs of a direct link or an HTML/JSON gallery page. Pages are
+        fetched conditionally (ETag/Last-Modified); an unchanged page reuses
+        the URLs from its last scan, otherwise it is scanned as it streams in.
+        """
         parsed = urlparse(source_url)
         if parsed.path.lower().endswith((".jpg", ".jpeg", ".png", ".bmp", ".webp")):
             return [source_url]
 
+        cached = self._photo_page_cache.get(source_url)
+        headers = {}
+        if cached and cached["etag"]: headers["If-None-Match"] = cached["etag"]
+        if cached and cached["last_modified"]: headers["If-Modified-Since"] = cached["last_modified"]
         try:
-            response = requests.get(source_url, timeout=12)
-            if response.status_code != 200:
-                return []
-            content = response.text
-            candidates = set()
-            for match in re.findall(r'https?://[^"\\\']+', content):
-                if re.search(r'\.(jpg|jpeg|png|bmp|webp)(\?|$)', match, flags=re.IGNORECASE):
-                    candidates.add(match.replace("\\/", "/"))
+            with self._pooled_session(self._photo_adapter).get(source_url, headers=headers, timeout=12, stream=True) as response:
+                if response.status_code == 304 and cached:
+                    print(f"[Photos] Page not modified, reusing {len(cached['urls'])} URL(s): {source_url[:120]}", flush=True)
+                    return list(cached["urls"])
+                if response.status_code != 200:
+                    return []
+                candidates = self._scan_image_urls(response.iter_content(self.PHOTO_PAGE_CHUNK_BYTES))
+                etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+            if etag or last_modified:
+                self._photo_page_cache[source_url] = {"etag": etag, "last_modified": last_modified, "urls": candidates}
             return list(candidates)
         except:
             return []
 
+    def _scan_image_urls(self, chunks):
+        """
+        Finds image URLs in a byte stream. Only the tail after the last
+        delimiter is carried into the next chunk, so a URL split across a
+        chunk boundary is still matched whole.
+        """
+        candidates = set()
+        carry = b""
+        for chunk in chunks:
+            buffer = carry + chunk
+            cut = max(buffer.rfind(d) for d in self._URL_DELIMITERS) + 1
+            if cut == 0:
+                # No delimiter at all; keep a bounded tail in case a URL is starting.
+                carry = buffer[-self.PHOTO_PAGE_CHUNK_BYTES:]
+                continue
+            for match in self._IMAGE_URL_RE.finditer(buffer, 0, cut):
+                candidates.add(match.group(0).replace(b"\\/", b"/").decode("utf-8", "ignore"))
+            carry = buffer[cut:]
+        for match in self._IMAGE_URL_RE.finditer(carry):
+            candidates.add(match.group(0).replace(b"\\/", b"/").decode("utf-8", "ignore"))
+        return sorted(candidates)
+
     def _extract_icloud_shared_album_token(self, source_url):
         parsed = urlparse(source_url.strip())
         host = (parsed.netloc or "").lower()
@@ -886,58 +1945,100 @@ class SmartClockBackend(QObject):
         except ValueError:
             return None
 
+    def _normalize_image_url(self, raw):
+        """Absolute image URL for a candidate string, or None if it can't be one."""
+        url = raw.strip()
+        if not url:
+            return None
+        if "\\/" in url:
+            url = url.replace("\\/", "/")
+        if url.startswith("//"):
+            return f"https:{url}"
+        if "://" in url and self._URL_SCHEME_RE.match(url):
+            return url
+        # iCloud sometimes returns host/path without scheme.
+        if url.startswith(("cvws.icloud-content.com/", "p")) or ".icloud-content.com/" in url or ".icloud.com/" in url:
+            return f"https://{url.lstrip('/')}"
+        return None
+
+    def _add_item_urls(self, item, out):
+        """URLs held directly by one dict: url_location + url_path, or one of the known URL keys."""
+        url_location = item.get("url_location")
+        url_path = item.get("url_path")
+        if isinstance(url_location, str) and isinstance(url_path, str):
+            url = self._normalize_image_url(f"{url_location.rstrip('/')}/{url_path.lstrip('/')}")
+            if url:
+                out.add(url)
+        for key in self._IMAGE_URL_KEYS:
+            raw = item.get(key)
+            if isinstance(raw, str):
+                url = self._normalize_image_url(raw)
+                if url:
+                    out.add(url)
+
     def _collect_photo_guids(self, value, out):
-        if isinstance(value, dict):
-            guid = value.get("photoGuid")
-            if isinstance(guid, str) and guid:
-                out.add(guid)
-            for child in value.values():
-                self._collect_photo_guids(child, out)
-            return
-        if isinstance(value, list):
-            for child in value:
-                self._collect_photo_guids(child, out)
+        """photoGuids of a webstream payload; unknown shapes are walked iteratively."""
+        photos = value.get("photos") if isinstance(value, dict) else None
+        if isinstance(photos, list):
+            for photo in photos:
+                guid = photo.get("photoGuid") if isinstance(photo, dict) else None
+                if isinstance(guid, str) and guid:
+                    out.add(guid)
+            if out:
+                return
+        stack = [value]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, dict):
+                guid = node.get("photoGuid")
+                if isinstance(guid, str) and guid:
+                    out.add(guid)
+                stack.extend(child for child in node.values() if isinstance(child, (dict, list)))
+            elif isinstance(node, list):
+                stack.extend(child for child in node if isinstance(child, (dict, list)))
 
     def _collect_image_urls(self, value, out):
-        def add_candidate(raw):
-            if not isinstance(raw, str):
+        """
+        Candidate image URLs of an iCloud payload. The known shapes, webasseturls
+        items{} and webstream photos[].derivatives, are read directly; anything
+        else falls back to an iterative walk over every string in the tree.
+        """
+        if isinstance(value, dict):
+            items = value.get("items")
+            if isinstance(items, dict):
+                for item in items.values():
+                    if isinstance(item, dict):
+                        self._add_item_urls(item, out)
                 return
-            url = raw.strip().replace("\\/", "/")
-            if not url:
+            photos = value.get("photos")
+            if isinstance(photos, list):
+                for photo in photos:
+                    derivatives = photo.get("derivatives") if isinstance(photo, dict) else None
+                    if isinstance(derivatives, dict):
+                        for derivative in derivatives.values():
+                            if isinstance(derivative, dict):
+                                self._add_item_urls(derivative, out)
                 return
-            if url.startswith("//"):
-                url = f"https:{url}"
-            elif not re.match(r"^[a-zA-Z][a-zA-Z0-9+.-]*://", url):
-                # iCloud sometimes returns host/path without scheme.
-                if url.startswith(("cvws.icloud-content.com/", "p")) or ".icloud-content.com/" in url or ".icloud.com/" in url:
-                    url = f"https://{url.lstrip('/')}"
-                else:
-                    return
-            out.add(url)
-
-        if isinstance(value, dict):
-            url_location = value.get("url_location")
-            url_path = value.get("url_path")
-            if isinstance(url_location, str) and isinstance(url_path, str):
-                add_candidate(f"{url_location.rstrip('/')}/{url_path.lstrip('/')}")
-
-            for key in ("url", "downloadUrl", "photoUrl", "webAssetUrl"):
-                item = value.get(key)
-                add_candidate(item)
 
-            for child in value.values():
-                self._collect_image_urls(child, out)
-            return
-
-        if isinstance(value, list):
-            for child in value:
-                self._collect_image_urls(child, out)
-            return
-
-        if isinstance(value, str):
-            add_candidate(value)
-
-    def _icloud_sharedstreams_post(self, host, token, path, payload):
+        stack = [value]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, dict):
+                url_location = node.get("url_location")
+                url_path = node.get("url_path")
+                if isinstance(url_location, str) and isinstance(url_path, str):
+                    url = self._normalize_image_url(f"{url_location.rstrip('/')}/{url_path.lstrip('/')}")
+                    if url:
+                        out.add(url)
+                stack.extend(node.values())
+            elif isinstance(node, list):
+                stack.extend(node)
+            elif isinstance(node, str):
+                url = self._normalize_image_url(node)
+                if url:
+                    out.add(url)
+
+    def _icloud_sharedstreams_post(self, host, token, path, payload, timeout=(10, 70)):
         headers = {
             "User-Agent": "Mozilla/5.0",
             "Accept": "application/json, text/plain, */*",
@@ -950,7 +2051,7 @@ class SmartClockBackend(QObject):
         started = time.time()
         try:
             # iCloud sharedstreams can be very slow to return first payloads.
-            response = requests.post(url, headers=headers, json=payload, timeout=(10, 70))
+            response = self._pooled_session(self._icloud_adapter).post(url, headers=headers, json=payload, timeout=timeout)
         except Exception as e:
             elapsed = time.time() - started
             print(f"[Photos] iCloud request error on {path} after {elapsed:.1f}s: {e}", flush=True)
@@ -973,55 +2074,208 @@ class SmartClockBackend(QObject):
             return None, host
         return data, host
 
+    def _icloud_photo_checksums(self, webstream_data):
+        """{photoGuid: [derivative checksums]} from a webstream payload."""
+        out = {}
+        photos = webstream_data.get("photos") if isinstance(webstream_data, dict) else None
+        for photo in photos if isinstance(photos, list) else []:
+            if not isinstance(photo, dict) or not isinstance(photo.get("photoGuid"), str) or self._icloud_photo_is_deleted(photo):
+                continue
+            derivatives = photo.get("derivatives")
+            checksums = []
+            if isinstance(derivatives, dict):
+                for derivative in derivatives.values():
+                    if isinstance(derivative, dict) and isinstance(derivative.get("checksum"), str):
+                        checksums.append(derivative["checksum"])
+            out[photo["photoGuid"]] = checksums
+        return out
+
+    def _icloud_deleted_guids(self, webstream_data):
+        """GUIDs a delta response marks as deleted (list keys or per-photo flags)."""
+        deleted = set()
+        if not isinstance(webstream_data, dict):
+            return deleted
+        for key in self._ICLOUD_DELETED_LIST_KEYS:
+            values = webstream_data.get(key)
+            if isinstance(values, list):
+                deleted.update(v for v in values if isinstance(v, str) and v)
+        photos = webstream_data.get("photos")
+        for photo in photos if isinstance(photos, list) else []:
+            if isinstance(photo, dict) and isinstance(photo.get("photoGuid"), str) and self._icloud_photo_is_deleted(photo):
+                deleted.add(photo["photoGuid"])
+        return deleted
+
+    def _icloud_photo_is_deleted(self, photo):
+        return any(str(photo.get(flag, "")).lower() in ("1", "true") for flag in self._ICLOUD_DELETED_FLAGS)
+
+    def _icloud_item_urls(self, webasset_data, checksums):
+        items = webasset_data.get("items") if isinstance(webasset_data, dict) else None
+        urls = set()
+        for checksum in checksums:
+            item = items.get(checksum) if isinstance(items, dict) else None
+            if isinstance(item, dict):
+                self._add_item_urls(item, urls)
+        return urls
+
+    def _prune_icloud_photos(self, token, album, removed):
+        """Deletes cached files of photos that are no longer in the album."""
+        cache_keys = set()
+        for guid in removed:
+            cache_keys.update(album["photos"][guid]["cache_keys"])
+        files = [name for name, item in self._photo_catalog.items() if item.get("cache_key") in cache_keys]
+        for name in files:
+            try:
+                self._remove_cached_photo(name)
+            except Exception as e:
+                print(f"[Photos] Failed to prune {name}: {e}", flush=True)
+                continue
+            del self._photo_catalog[name]
+        database.delete_photo_entries(files)
+        database.delete_icloud_photos(token, removed)
+        print(f"[Photos] iCloud album: {len(removed)} photo(s) removed, pruned {len(files)} cached file(s)", flush=True)
+
     def _extract_icloud_shared_album_urls(self, source_url):
+        """
+        Incremental sync of a shared album. The stream ctag and the photo GUIDs
+        seen so far are kept per token; only GUIDs that are new (or were never
+        stored successfully) are sent to webasseturls. Yields lists of image
+        URLs as they are resolved.
+
+        A request carrying a ctag may come back as a delta, so photos are only
+        pruned on explicit deletion markers or, for GUIDs missing from the
+        listing, after a full sync (no ctag sent). A full sync is forced on the
+        first refresh after start and every ICLOUD_FULL_SYNC_SECONDS.
+        """
         token = self._extract_icloud_shared_album_token(source_url)
         if not token:
-            return []
+            return
         print(f"[Photos] iCloud shared album detected. Token: {token[:4]}***", flush=True)
 
-        partition = self._decode_icloud_server_partition(token)
-        if partition is None:
-            print("[Photos] Could not decode iCloud partition from token.", flush=True)
-            return []
-
-        host = f"p{partition:02d}-sharedstreams.icloud.com"
+        album = database.get_icloud_album(token)
+        host = album["host"]
+        if not host:
+            partition = self._decode_icloud_server_partition(token)
+            if partition is None:
+                print("[Photos] Could not decode iCloud partition from token.", flush=True)
+                return
+            host = f"p{partition:02d}-sharedstreams.icloud.com"
         print(f"[Photos] iCloud initial sharedstreams host: {host}", flush=True)
 
+        last_full_sync = self._icloud_full_sync_at.get(token)
+        full_sync = not album["stream_ctag"] or last_full_sync is None or time.monotonic() - last_full_sync >= self.ICLOUD_FULL_SYNC_SECONDS
+        sent_ctag = None if full_sync else album["stream_ctag"]
+
         webstream_data = None
         for attempt in range(1, 3):
-            print(f"[Photos] iCloud webstream attempt {attempt}/2", flush=True)
-            webstream_data, next_host = self._icloud_sharedstreams_post(host, token, "webstream", {"streamCtag": None})
+            print(f"[Photos] iCloud webstream attempt {attempt}/2 ({'full' if full_sync else 'incremental'})", flush=True)
+            webstream_data, next_host = self._icloud_sharedstreams_post(host, token, "webstream", {"streamCtag": sent_ctag})
             host = next_host
             if webstream_data:
                 break
         if not webstream_data:
             print("[Photos] iCloud webstream request failed.", flush=True)
-            return []
+            return
 
-        photo_guids = set()
-        self._collect_photo_guids(webstream_data, photo_guids)
+        stream_ctag = webstream_data.get("streamCtag") if isinstance(webstream_data.get("streamCtag"), str) else None
+        listing = self._icloud_photo_checksums(webstream_data)
+        if not listing:
+            # Unknown payload shape: fall back to any photoGuid found anywhere.
+            guids = set()
+            self._collect_photo_guids(webstream_data, guids)
+            listing = {guid: [] for guid in guids}
+        known = album["photos"]
+        deleted = self._icloud_deleted_guids(webstream_data)
+        for guid in deleted:
+            listing.pop(guid, None)
+        removed = {guid for guid in deleted if guid in known}
+        if full_sync:
+            # Only a full listing says anything about GUIDs it doesn't mention,
+            # and an empty one is never trusted to mean "album emptied".
+            if listing:
+                removed.update(guid for guid in known if guid not in listing)
+                self._icloud_full_sync_at[token] = time.monotonic()
+        removed = sorted(removed)
+        if removed:
+            self._prune_icloud_photos(token, album, removed)
+
+        # A GUID counts as settled once one of its cache keys has a file in the
+        # catalog (or had one until the quota evicted it); unsettled ones are
+        # retried a few times before giving up.
+        cached_keys = {item.get("cache_key") for item in self._photo_catalog.values()}
+
+        def settled(cache_keys):
+            return bool(cached_keys.intersection(cache_keys)) or any(
+                hashlib.sha256(key.encode("utf-8")).hexdigest() in self._photo_evicted for key in cache_keys)
+
+        pending = [
+            guid for guid in listing
+            if guid not in known or (known[guid]["tries"] < self.ICLOUD_MAX_GUID_TRIES and not settled(known[guid]["cache_keys"]))
+        ]
 
         urls = set()
         self._collect_image_urls(webstream_data, urls)
-
-        if photo_guids:
-            payload = {"photoGuids": list(photo_guids)}
-            for attempt in range(1, 3):
-                print(f"[Photos] iCloud webasseturls attempt {attempt}/2", flush=True)
-                webasset_data, next_host = self._icloud_sharedstreams_post(host, token, "webasseturls", payload)
-                host = next_host
-                if webasset_data:
-                    self._collect_image_urls(webasset_data, urls)
-                    break
-
-        print(f"[Photos] iCloud album resolved. photoGuids={len(photo_guids)}, candidateUrls={len(urls)}", flush=True)
-        return list(urls)
+        if urls:
+            yield list(urls)
+
+        # webasseturls is resolved in fixed-size batches on a small pool; each
+        # batch is stored and handed to the downloader as soon as it lands.
+        batches = [pending[i:i + self.ICLOUD_ASSET_BATCH_SIZE] for i in range(0, len(pending), self.ICLOUD_ASSET_BATCH_SIZE)]
+        shared = {"host": host}
+        failed = 0
+        if batches:
+            with ThreadPoolExecutor(max_workers=min(self.ICLOUD_ASSET_WORKERS, len(batches))) as pool:
+                futures = [pool.submit(self._icloud_resolve_asset_batch, token, batch, shared) for batch in batches]
+                for future in as_completed(futures):
+                    batch, webasset_data = future.result()
+                    if not webasset_data:
+                        failed += len(batch)
+                        continue
+                    batch_urls = set()
+                    updates = {}
+                    for guid in batch:
+                        guid_urls = self._icloud_item_urls(webasset_data, listing[guid])
+                        batch_urls.update(guid_urls)
+                        tries = known[guid]["tries"] + 1 if guid in known else 1
+                        updates[guid] = {"cache_keys": sorted({self._cache_key_for_image_url(u) for u in guid_urls}), "tries": tries}
+                    self._collect_image_urls(webasset_data, batch_urls)
+                    database.upsert_icloud_photos(token, updates)
+                    batch_urls -= urls
+                    urls.update(batch_urls)
+                    if batch_urls:
+                        yield list(batch_urls)
+        # Only advance the ctag once every new GUID is stored, so failed
+        # batches are retried on the next refresh.
+        if not failed:
+            database.save_icloud_album(token, stream_ctag, shared["host"])
+
+        print(f"[Photos] iCloud album synced. photoGuids={len(listing)}, new={len(pending)}, removed={len(removed)}, "
+              f"batches={len(batches)}, failedGuids={failed}, candidateUrls={len(urls)}", flush=True)
+
+    def _icloud_resolve_asset_batch(self, token, batch, shared):
+        """
+        Resolves one webasseturls batch with its own retries. A 330 redirect
+        switches the shared host for every batch, and the retry goes straight there.
+        """
+        for attempt in range(1, self.ICLOUD_ASSET_ATTEMPTS + 1):
+            host = shared["host"]
+            data, next_host = self._icloud_sharedstreams_post(host, token, "webasseturls", {"photoGuids": batch}, timeout=(10, 30))
+            if data:
+                return batch, data
+            if next_host != host:
+                shared["host"] = next_host
+                continue
+            if attempt < self.ICLOUD_ASSET_ATTEMPTS:
+                time.sleep(attempt)
+        print(f"[Photos] iCloud webasseturls batch of {len(batch)} failed after {self.ICLOUD_ASSET_ATTEMPTS} attempt(s)", flush=True)
+        return batch, None
 
     def _resolve_source_image_urls(self, source_url):
+        """Yields batches of candidate image URLs for one configured source."""
         icloud_token = self._extract_icloud_shared_album_token(source_url)
         if icloud_token:
-            return self._extract_icloud_shared_album_urls(source_url)
-        return self._extract_direct_image_urls(source_url)
+            yield from self._extract_icloud_shared_album_urls(source_url)
+            return
+        yield self._extract_direct_image_urls(source_url)
 
     def _cache_key_for_image_url(self, image_url):
         parsed = urlparse(image_url)
@@ -1046,121 +2300,582 @@ class SmartClockBackend(QObject):
             return f"{host}{parsed.path}"
         return self._cache_key_for_image_url(image_url)
 
-    def _load_low_res_rejections(self):
+    def _migrate_photo_rejections_file(self):
+        """One-off import of the old photo_rejections.json into the database."""
         if not self.photo_rejections_file.exists():
-            return set()
+            return
         try:
             with open(self.photo_rejections_file, "r", encoding="utf-8") as f:
                 data = json.load(f)
             items = data.get("low_res_rejections", []) if isinstance(data, dict) else []
-            return {x.strip() for x in items if isinstance(x, str) and x.strip()}
+            keys = {x.strip() for x in items if isinstance(x, str) and x.strip()}
+            database.add_photo_rejections(keys)
+            os.replace(self.photo_rejections_file, self.photo_rejections_file.with_suffix(".json.migrated"))
+            print(f"[Photos] Migrated {len(keys)} photo rejection key(s) to the database", flush=True)
         except Exception as e:
-            print(f"[Photos] Failed to load photo rejections: {e}", flush=True)
-            return set()
+            print(f"[Photos] Failed to migrate photo rejections: {e}", flush=True)
 
-    def _save_low_res_rejections(self):
-        try:
-            payload = {"low_res_rejections": sorted(self._low_res_rejections)}
-            with open(self.photo_rejections_file, "w", encoding="utf-8") as f:
-                json.dump(payload, f, indent=2)
-        except Exception as e:
-            print(f"[Photos] Failed to save photo rejections: {e}", flush=True)
+    def _hash_file(self, path):
+        hasher = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                hasher.update(chunk)
+        return hasher.hexdigest()
+
+    def _sync_photo_catalog(self):
+        """
+        Brings the catalog in line with image_cache using stat data only;
+        a file is hashed only when it is new or its size/mtime changed.
+        """
+        if not self.image_cache_path.exists():
+            return self._photo_catalog
+        changed, seen = [], set()
+        with os.scandir(self.image_cache_path) as entries:
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                if entry.name.endswith(".part"):
+                    # Left behind by an interrupted download; nothing is
+                    # downloading while the catalog is synced.
+                    try:
+                        os.unlink(entry.path)
+                    except OSError:
+                        pass
+                    continue
+                seen.add(entry.name)
+                try:
+                    st = entry.stat()
+                    cached = self._photo_catalog.get(entry.name)
+                    if cached and cached["size"] == st.st_size and cached["mtime_ns"] == st.st_mtime_ns:
+                        continue
+                    item = database.photo_entry(entry.name, st.st_size, st.st_mtime_ns, self._hash_file(entry.path),
+                                                cached["cache_key"] if cached else None, cached["last_shown"] if cached else 0)
+                except OSError:
+                    continue
+                self._photo_catalog[entry.name] = item
+                changed.append(item)
+        display = set(os.listdir(self.image_display_path)) if self.image_display_path.exists() else set()
+        gone = [name for name in self._photo_catalog if name not in seen and self._display_name(name) not in display]
+        for name in gone:
+            del self._photo_catalog[name]
+        if changed:
+            database.upsert_photo_entries(changed)
+        if gone:
+            database.delete_photo_entries(gone)
+        if changed or gone:
+            print(f"[Photos] Catalog: hashed {len(changed)} file(s), dropped {len(gone)}, total {len(self._photo_catalog)}", flush=True)
+        return self._photo_catalog
+
+    def _photo_host_slot(self, image_url):
+        host = (urlparse(image_url).netloc or "").lower()
+        with self._photo_download_lock:
+            slot = self._photo_host_slots.get(host)
+            if slot is None:
+                slot = self._photo_host_slots[host] = threading.BoundedSemaphore(self._photo_download_per_host)
+            return slot
 
     def _download_remote_images(self, urls):
         downloaded = 0
-        min_side_px = 900
-        rejections_changed = False
-        cache_content_hashes = set()
-        for file in self.image_cache_path.iterdir():
-            if not file.is_file():
-                continue
+        started = time.monotonic()
+        # Shared by the download workers; mutated only under _photo_download_lock.
+        content_hashes = {item["digest"] for item in self._sync_photo_catalog().values()}
+        state = {"content_hashes": content_hashes, "new_rejections": {}, "new_entries": [], "fetched": 0, "bytes": 0}
+        # Cache files are named sha256(cache_key), so a known or evicted photo
+        # is skipped here without opening a connection.
+        cached_stems = {Path(name).stem for name in self._photo_catalog}
+        evicted_stems = self._photo_evicted
+        # Evictions past their TTL are forgotten, so those photos rotate back in.
+        cutoff = time.time() - self.PHOTO_EVICTED_TTL_SECONDS
+        expired = [stem for stem, evicted_at in evicted_stems.items() if evicted_at < cutoff]
+        if expired:
+            for stem in expired:
+                del evicted_stems[stem]
+            database.forget_evicted_photos(expired)
+
+        live_stems, live_complete = set(), True
+        with ThreadPoolExecutor(max_workers=self._photo_download_workers) as pool:
+            for source_url in urls:
+                # Downloads start as soon as the first batch of URLs is resolved.
+                candidates = 0
+                already_cached = 0
+                evicted = 0
+                seen_keys = set()
+                jobs = []
+                for resolved_urls in self._resolve_source_image_urls(source_url):
+                    candidates += len(resolved_urls)
+                    for image_url in resolved_urls:
+                        cache_key = self._cache_key_for_image_url(image_url)
+                        if cache_key in seen_keys:
+                            continue
+                        seen_keys.add(cache_key)
+                        stem = hashlib.sha256(cache_key.encode("utf-8")).hexdigest()
+                        if stem in cached_stems:
+                            already_cached += 1
+                            continue
+                        if stem in evicted_stems:
+                            evicted += 1
+                            continue
+                        jobs.append(pool.submit(self._download_remote_image, cache_key, image_url, state))
+                print(f"[Photos] Source: {source_url} -> {candidates} candidate URL(s), deduped to {len(seen_keys)} cache key(s), "
+                      f"{already_cached} already cached, {evicted} evicted", flush=True)
+                source_downloaded = sum(1 for job in jobs if job.result())
+                downloaded += source_downloaded
+                print(f"[Photos] Source done: downloaded {source_downloaded} new image(s)", flush=True)
+
+                # Everything this source still references, including iCloud
+                # photos that weren't re-resolved because they're already cached.
+                source_keys = set(seen_keys)
+                token = self._extract_icloud_shared_album_token(source_url)
+                if token:
+                    for photo in database.get_icloud_album(token)["photos"].values():
+                        source_keys.update(photo["cache_keys"])
+                if not source_keys:
+                    live_complete = False
+                live_stems.update(hashlib.sha256(key.encode("utf-8")).hexdigest() for key in source_keys)
+        self._photo_live_stems = live_stems if live_complete else None
+        if live_complete:
+            # A photo that left every album may come back as new later.
+            stale = [stem for stem in evicted_stems if stem not in live_stems]
+            if stale:
+                for stem in stale:
+                    del evicted_stems[stem]
+                database.forget_evicted_photos(stale)
+
+        elapsed = max(time.monotonic() - started, 0.001)
+        megabytes = state["bytes"] / (1024 * 1024)
+        print(f"[Photos] Transferred {state['fetched']} image(s), {megabytes:.1f} MB in {elapsed:.1f}s "
+              f"({state['fetched'] / elapsed:.1f} images/s, {megabytes / elapsed:.2f} MB/s, "
+              f"workers={self._photo_download_workers}, per_host={self._photo_download_per_host})", flush=True)
+        if state["new_entries"]:
+            for item in state["new_entries"]:
+                self._photo_catalog[item["file"]] = item
+            database.upsert_photo_entries(state["new_entries"])
+        if state["new_rejections"]:
+            for reason, keys in state["new_rejections"].items():
+                database.add_photo_rejections(keys, reason)
+            print(f"[Photos] Saved low-res rejection keys: {len(self._low_res_rejections)}", flush=True)
+        return downloaded
+
+    def _probe_image_size(self, head):
+        """
+        Reads (width, height) from the first bytes of a JPEG, PNG or WebP file.
+        Returns None if the header isn't complete yet or the format is unknown.
+        """
+        if head[:8] == b"\x89PNG\r\n\x1a\n":
+            if len(head) >= 24 and head[12:16] == b"IHDR":
+                return int.from_bytes(head[16:20], "big"), int.from_bytes(head[20:24], "big")
+            return None
+        if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+            chunk = head[12:16]
+            if chunk == b"VP8 " and len(head) >= 30 and head[23:26] == b"\x9d\x01\x2a":
+                return int.from_bytes(head[26:28], "little") & 0x3FFF, int.from_bytes(head[28:30], "little") & 0x3FFF
+            if chunk == b"VP8L" and len(head) >= 25 and head[20] == 0x2F:
+                bits = int.from_bytes(head[21:25], "little")
+                return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+            if chunk == b"VP8X" and len(head) >= 30:
+                return int.from_bytes(head[24:27], "little") + 1, int.from_bytes(head[27:30], "little") + 1
+            return None
+        if head[:2] == b"\xff\xd8":
+            # Walk the marker segments (EXIF, ICC, thumbnails...) up to the first SOFn.
+            pos = 2
+            while pos + 4 <= len(head):
+                if head[pos] != 0xFF:
+                    return None
+                marker = head[pos + 1]
+                if marker == 0xFF:
+                    pos += 1
+                    continue
+                if marker in (0x01, 0xD8) or 0xD0 <= marker <= 0xD7:
+                    pos += 2
+                    continue
+                length = int.from_bytes(head[pos + 2:pos + 4], "big")
+                if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                    if pos + 9 > len(head):
+                        return None
+                    return int.from_bytes(head[pos + 7:pos + 9], "big"), int.from_bytes(head[pos + 5:pos + 7], "big")
+                pos += 2 + length
+        return None
+
+    def _reject_photo(self, rejection_key, reason, state):
+        with self._photo_download_lock:
+            if rejection_key not in self._low_res_rejections:
+                self._low_res_rejections.add(rejection_key)
+                state["new_rejections"].setdefault(reason, []).append(rejection_key)
+
+    def _download_remote_image(self, cache_key, image_url, state):
+        """
+        Downloads one candidate on a pool worker. Returns True if a new file was written.
+        Dimensions are probed from the first few KB, so low-resolution or
+        oversized images are dropped before the body is transferred, and the
+        body streams to a .part file instead of being held in memory.
+        """
+        tmp_path = None
+        try:
+            rejection_key = self._rejection_key_for_image_url(image_url)
+            with self._photo_download_lock:
+                if rejection_key in self._low_res_rejections:
+                    return False
+            digest = hashlib.sha256(cache_key.encode("utf-8")).hexdigest()
+            with self._photo_host_slot(image_url), self._pooled_session(self._photo_adapter).get(image_url, timeout=15, stream=True) as response:
+                if response.status_code != 200:
+                    print(f"[Photos] Skip URL (status {response.status_code}): {image_url[:120]}", flush=True)
+                    return False
+                content_type = (response.headers.get("content-type") or "").lower()
+                if content_type and not content_type.startswith("image/"):
+                    print(f"[Photos] Skip URL (non-image content-type {content_type}): {image_url[:120]}", flush=True)
+                    return False
+                length = response.headers.get("content-length")
+                if length and length.isdigit() and int(length) > self.PHOTO_MAX_BYTES:
+                    print(f"[Photos] Skip URL (too large, {int(length)} bytes): {image_url[:120]}", flush=True)
+                    self._reject_photo(rejection_key, "oversized", state)
+                    return False
+
+                chunks = response.iter_content(self.PHOTO_STREAM_CHUNK_BYTES)
+                head = b""
+                size = None
+                for chunk in chunks:
+                    head += chunk
+                    size = self._probe_image_size(head)
+                    if size or len(head) >= self.PHOTO_PROBE_MAX_BYTES:
+                        break
+                with self._photo_download_lock:
+                    state["fetched"] += 1
+                    state["bytes"] += len(head)
+                if size:
+                    if min(size) < self.PHOTO_MIN_SIDE_PX:
+                        print(f"[Photos] Skip URL (low resolution {size[0]}x{size[1]}): {image_url[:120]}", flush=True)
+                        self._reject_photo(rejection_key, "low_res", state)
+                        return False
+                    if size[0] * size[1] > self.PHOTO_MAX_PIXELS:
+                        print(f"[Photos] Skip URL (oversized {size[0]}x{size[1]}): {image_url[:120]}", flush=True)
+                        self._reject_photo(rejection_key, "oversized", state)
+                        return False
+
+                ext = ".jpg"
+                parsed = urlparse(image_url)
+                suffix = Path(parsed.path).suffix.lower()
+                if suffix in [".jpg", ".jpeg", ".png", ".bmp", ".webp"]:
+                    ext = suffix
+                elif "png" in content_type:
+                    ext = ".png"
+                elif "webp" in content_type:
+                    ext = ".webp"
+                target = self.image_cache_path / f"{digest}{ext}"
+                if target.exists() or target.name in self._photo_catalog or digest in self._photo_evicted:
+                    return False
+
+                hasher = hashlib.sha256(head)
+                total = len(head)
+                tmp_path = target.with_name(f"{target.name}.{threading.get_ident()}.part")
+                with open(tmp_path, "wb") as f:
+                    f.write(head)
+                    for chunk in chunks:
+                        total += len(chunk)
+                        if total > self.PHOTO_MAX_BYTES:
+                            print(f"[Photos] Skip URL (exceeded {self.PHOTO_MAX_BYTES} bytes): {image_url[:120]}", flush=True)
+                            self._reject_photo(rejection_key, "oversized", state)
+                            return False
+                        hasher.update(chunk)
+                        f.write(chunk)
+                with self._photo_download_lock:
+                    state["bytes"] += total - len(head)
+
+            if not size:
+                # Format we can't probe (BMP, truncated header...): let Qt read
+                # the header from the file on disk instead.
+                probed = QImageReader(str(tmp_path)).size()
+                if not probed.isValid():
+                    print(f"[Photos] Skip URL (invalid image data): {image_url[:120]}", flush=True)
+                    return False
+                if min(probed.width(), probed.height()) < self.PHOTO_MIN_SIDE_PX:
+                    print(f"[Photos] Skip URL (low resolution {probed.width()}x{probed.height()}): {image_url[:120]}", flush=True)
+                    self._reject_photo(rejection_key, "low_res", state)
+                    return False
+
+            content_digest = hasher.hexdigest()
+            # Claim the content hash before renaming so two workers fetching
+            # the same photo under different URLs can't both store it.
+            with self._photo_download_lock:
+                if content_digest in state["content_hashes"] or target.exists():
+                    return False
+                state["content_hashes"].add(content_digest)
             try:
-                digest = hashlib.sha256(file.read_bytes()).hexdigest()
-                cache_content_hashes.add(digest)
+                os.replace(tmp_path, target)
+                tmp_path = None
+                st = target.stat()
             except Exception:
-                pass
+                with self._photo_download_lock:
+                    state["content_hashes"].discard(content_digest)
+                raise
+            with self._photo_download_lock:
+                state["new_entries"].append(database.photo_entry(target.name, st.st_size, st.st_mtime_ns, content_digest, cache_key))
+            return True
+        except Exception as e:
+            print(f"[Photos] Download error: {e}", flush=True)
+            return False
+        finally:
+            if tmp_path is not None:
+                try:
+                    tmp_path.unlink()
+                except FileNotFoundError:
+                    pass
 
-        for source_url in urls:
-            source_downloaded = 0
-            resolved_urls = self._resolve_source_image_urls(source_url)
-            print(f"[Photos] Source: {source_url} -> {len(resolved_urls)} candidate URL(s)", flush=True)
-            deduped = {}
-            for image_url in resolved_urls:
-                deduped[self._cache_key_for_image_url(image_url)] = image_url
-            print(f"[Photos] Source deduped to {len(deduped)} cache key(s)", flush=True)
+    def _remove_cached_photo(self, name):
+        """Deletes a cached original and its display derivative (either may be missing)."""
+        for path in (self.image_cache_path / name, self.image_display_path / self._display_name(name)):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
 
-            for cache_key, image_url in deduped.items():
+    def _evict_photo_cache(self):
+        """
+        Deletes cached photos until image_cache is within its byte and file
+        quotas. Sizes come from the catalog, so nothing is re-scanned; victims
+        are picked PHOTO_EVICT_BATCH at a time, photos no longer in any album
+        first, then least recently shown (or downloaded), until the cache is
+        back under the low-water mark. Evicted stems are recorded so the
+        downloader leaves them alone until their TTL runs out.
+        """
+        with self._photo_shown_lock:
+            shown, self._photo_shown_pending = self._photo_shown_pending, {}
+        for name, ts in shown.items():
+            if name in self._photo_catalog:
+                self._photo_catalog[name]["last_shown"] = ts
+        shown = {name: ts for name, ts in shown.items() if name in self._photo_catalog}
+        if shown:
+            database.touch_photo_entries(shown)
+
+        catalog = self._photo_catalog
+        total = sum(entry["size"] for entry in catalog.values())
+        if total <= self._photo_cache_max_bytes and len(catalog) <= self._photo_cache_max_files:
+            return 0
+        live = self._photo_live_stems
+        target_bytes = int(self._photo_cache_max_bytes * self.PHOTO_CACHE_LOW_WATER)
+        target_files = int(self._photo_cache_max_files * self.PHOTO_CACHE_LOW_WATER)
+
+        def rank(item):
+            name, entry = item
+            orphan = live is not None and Path(name).stem not in live
+            return (not orphan, max(entry["last_shown"], entry["mtime_ns"] // 1_000_000_000))
+
+        evicted, freed, failed = 0, 0, set()
+        while total > target_bytes or len(catalog) > target_files:
+            batch = heapq.nsmallest(self.PHOTO_EVICT_BATCH, ((n, e) for n, e in catalog.items() if n not in failed), key=rank)
+            if not batch:
+                break
+            removed = []
+            for name, entry in batch:
+                if total <= target_bytes and len(catalog) <= target_files:
+                    break
                 try:
-                    rejection_key = self._rejection_key_for_image_url(image_url)
-                    if rejection_key in self._low_res_rejections:
-                        continue
-                    response = requests.get(image_url, timeout=15)
-                    if response.status_code != 200:
-                        print(f"[Photos] Skip URL (status {response.status_code}): {image_url[:120]}", flush=True)
-                        continue
-                    content_type = (response.headers.get("content-type") or "").lower()
-                    if content_type and not content_type.startswith("image/"):
-                        print(f"[Photos] Skip URL (non-image content-type {content_type}): {image_url[:120]}", flush=True)
-                        continue
-                    image = QImage.fromData(response.content)
-                    if image.isNull():
-                        print(f"[Photos] Skip URL (invalid image data): {image_url[:120]}", flush=True)
-                        continue
-                    if min(image.width(), image.height()) < min_side_px:
-                        print(f"[Photos] Skip URL (low resolution {image.width()}x{image.height()}): {image_url[:120]}", flush=True)
-                        self._low_res_rejections.add(rejection_key)
-                        rejections_changed = True
-                        continue
-                    content_digest = hashlib.sha256(response.content).hexdigest()
-                    if content_digest in cache_content_hashes:
-                        continue
-                    digest = hashlib.sha256(cache_key.encode("utf-8")).hexdigest()
-                    ext = ".jpg"
-                    parsed = urlparse(image_url)
-                    suffix = Path(parsed.path).suffix.lower()
-                    if suffix in [".jpg", ".jpeg", ".png", ".bmp", ".webp"]:
-                        ext = suffix
-                    elif "png" in content_type:
-                        ext = ".png"
-                    elif "webp" in content_type:
-                        ext = ".webp"
-                    target = self.image_cache_path / f"{digest}{ext}"
-                    if target.exists():
-                        continue
-                    with open(target, "wb") as f:
-                        f.write(response.content)
-                    downloaded += 1
-                    source_downloaded += 1
-                    cache_content_hashes.add(content_digest)
+                    self._remove_cached_photo(name)
                 except Exception as e:
-                    print(f"[Photos] Download error: {e}", flush=True)
-            print(f"[Photos] Source done: downloaded {source_downloaded} new image(s)", flush=True)
-        if rejections_changed:
-            self._save_low_res_rejections()
-            print(f"[Photos] Saved low-res rejection keys: {len(self._low_res_rejections)}", flush=True)
-        return downloaded
+                    print(f"[Photos] Failed to evict {name}: {e}", flush=True)
+                    failed.add(name)
+                    continue
+                total -= entry["size"]
+                freed += entry["size"]
+                del catalog[name]
+                removed.append(name)
+            database.delete_photo_entries(removed)
+            stems = [Path(name).stem for name in removed]
+            evicted_at = int(time.time())
+            self._photo_evicted.update((stem, evicted_at) for stem in stems)
+            database.add_photo_rejections(stems, "evicted")
+            evicted += len(removed)
+            # Let the slideshow and downloads have the SD card between batches.
+            time.sleep(0.05)
+        print(f"[Photos] Evicted {evicted} cached photo(s), freed {freed / (1024 * 1024):.1f} MB; "
+              f"cache now {len(catalog)} file(s), {total / (1024 * 1024):.1f} MB", flush=True)
+        return evicted
 
     def _dedupe_cache_by_content(self):
-        if not self.image_cache_path.exists():
-            return 0
-        seen = {}
-        removed = 0
-        for file in sorted(self.image_cache_path.iterdir(), key=lambda p: p.name):
-            if not file.is_file():
+        """Removes cache files whose content digest (from the catalog) is already present."""
+        catalog = self._sync_photo_catalog()
+        seen = set()
+        removed = []
+        for name in sorted(catalog):
+            digest = catalog[name]["digest"]
+            if digest not in seen:
+                seen.add(digest)
                 continue
             try:
-                digest = hashlib.sha256(file.read_bytes()).hexdigest()
+                self._remove_cached_photo(name)
             except Exception:
                 continue
-            if digest in seen:
+            removed.append(name)
+        for name in removed:
+            del catalog[name]
+        if removed:
+            database.delete_photo_entries(removed)
+        return len(removed)
+
+    def _detect_display_size(self):
+        """Physical pixel size of the screen, overridable with photo_display_size: [w, h]."""
+        configured = self.secrets.get("photo_display_size")
+        if isinstance(configured, list) and len(configured) == 2:
+            return int(configured[0]), int(configured[1])
+        screen = QGuiApplication.primaryScreen()
+        if screen is None:
+            return 1920, 1080
+        ratio = screen.devicePixelRatio()
+        return round(screen.size().width() * ratio), round(screen.size().height() * ratio)
+
+    def _display_name(self, name, local=False):
+        if local:
+            return f"local-{name.replace('.', '_')}.jpg"
+        return f"{Path(name).stem}.jpg"
+
+    def _make_display_derivative(self, source, target):
+        """
+        Writes a progressive JPEG scaled to cover the screen, with EXIF rotation
+        applied. Returns False if the original is already small enough to show as is.
+        """
+        reader = QImageReader(str(source))
+        reader.setAutoTransform(True)
+        size = reader.size()
+        if not size.isValid():
+            return False
+        width, height = size.width(), size.height()
+        rotated = bool(reader.transformation() & QImageIOHandler.TransformationRotate90)
+        shown_w, shown_h = (height, width) if rotated else (width, height)
+        screen_w, screen_h = self._display_size
+        scale = max(screen_w / shown_w, screen_h / shown_h)
+        if scale >= 1 and reader.transformation() == QImageIOHandler.TransformationNone:
+            return False
+        if scale < 1:
+            # Lets the JPEG decoder downscale while decoding (much cheaper).
+            reader.setScaledSize(QSize(max(1, round(width * scale)), max(1, round(height * scale))))
+        image = reader.read()
+        if image.isNull():
+            raise ValueError(reader.errorString())
+        tmp_path = target.with_name(target.name + ".part")
+        writer = QImageWriter(str(tmp_path), b"jpeg")
+        writer.setQuality(self.PHOTO_DERIVATIVE_QUALITY)
+        writer.setProgressiveScanWrite(True)
+        writer.setOptimizedWrite(True)
+        if not writer.write(image):
+            tmp_path.unlink(missing_ok=True)
+            raise ValueError(writer.errorString())
+        os.replace(tmp_path, target)
+        return True
+
+    def _ingest_display_derivative(self, source, target, discard_source):
+        try:
+            if not self._make_display_derivative(source, target):
+                return source.name, False
+            if discard_source:
+                source.unlink()
+            return source.name, True
+        except Exception as e:
+            print(f"[Photos] Derivative failed for {source.name}: {e}", flush=True)
+            return source.name, None
+
+    def _ingest_display_derivatives(self):
+        """
+        Creates missing display-size derivatives on the derivative pool and
+        waits for them; drops derivatives whose original no longer exists.
+        """
+        started = time.monotonic()
+        display = set(os.listdir(self.image_display_path))
+        jobs, wanted = [], set()
+        for file in os.listdir(self.image_source_path):
+            if not file.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp', '.webp')):
+                continue
+            name = self._display_name(file, local=True)
+            wanted.add(name)
+            source = self.image_source_path / file
+            if name in display:
                 try:
-                    file.unlink()
-                    removed += 1
-                except Exception:
+                    if (self.image_display_path / name).stat().st_mtime_ns >= source.stat().st_mtime_ns:
+                        continue
+                except OSError:
+                    continue
+            elif str(source) in self._photo_derivative_skipped:
+                continue
+            jobs.append((source, self.image_display_path / name, False))
+        for file in self._photo_catalog:
+            name = self._display_name(file)
+            wanted.add(name)
+            source = self.image_cache_path / file
+            if name in display or str(source) in self._photo_derivative_skipped or not source.exists():
+                continue
+            jobs.append((source, self.image_display_path / name, not self._photo_keep_originals))
+
+        for name in display - wanted:
+            if name.endswith((".jpg", ".part")):
+                try:
+                    (self.image_display_path / name).unlink()
+                except OSError:
                     pass
-            else:
-                seen[digest] = file
-        return removed
+        if not jobs:
+            return 0
+        created = 0
+        resized = []
+        for (source, target, discard), (_, result) in zip(jobs, self._photo_derivative_pool.map(lambda job: self._ingest_display_derivative(*job), jobs)):
+            if result:
+                created += 1
+                entry = self._photo_catalog.get(source.name) if discard else None
+                if entry:
+                    # The derivative is all that's left on disk; count it for the quota.
+                    try:
+                        entry["size"] = target.stat().st_size
+                        resized.append(entry)
+                    except OSError:
+                        pass
+            elif result is False:
+                self._photo_derivative_skipped.add(str(source))
+        if resized:
+            database.upsert_photo_entries(resized)
+        print(f"[Photos] Display derivatives: created {created}, kept {len(jobs) - created} original(s) "
+              f"for {self._display_size[0]}x{self._display_size[1]} in {time.monotonic() - started:.1f}s", flush=True)
+        return created
+
+    # --- WALL-CLOCK SCHEDULING ---
+    def _ms_until(self, target_dt):
+        return max(0, int((target_dt - datetime.now()).total_seconds() * 1000))
+
+    def _arm_minute_timer(self):
+        now = datetime.now()
+        self._next_minute_at = now.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        self._minute_timer.start(self._ms_until(self._next_minute_at))
+
+    def _on_minute_timer(self):
+        now = datetime.now()
+        if self._next_minute_at and abs((now - self._next_minute_at).total_seconds()) > 5:
+            # Wall clock jumped (e.g. NTP sync after boot): the monotonic
+            # deadline timers are now wrong, so recompute all of them.
+            print(f"DEBUG: Clock jump detected ({now - self._next_minute_at}), re-arming timers")
+            self._update_night_mode(now)
+            self._arm_night_timer()
+            self._arm_weather_timer()
+            self._arm_alarm_timer()
+        self._tick()
+        self._arm_minute_timer()
+
+    def _is_night_time(self, now):
+        return now.hour >= 22 or now.hour < 5
+
+    def _arm_night_timer(self):
+        now = datetime.now()
+        midnight = datetime.combine(now.date(), datetime.min.time())
+        candidates = [midnight + timedelta(hours=5), midnight + timedelta(hours=22), midnight + timedelta(days=1, hours=5)]
+        next_switch = next(c for c in candidates if c > now)
+        self._night_timer.start(self._ms_until(next_switch))
+
+    def _on_night_timer(self):
+        self._update_night_mode(datetime.now())
+        self._arm_night_timer()
+
+    def _arm_weather_timer(self):
+        now = datetime.now()
+        quarter = now.replace(minute=(now.minute // 15) * 15, second=0, microsecond=0)
+        self._weather_timer.start(self._ms_until(quarter + timedelta(minutes=15)))
+
+    def _on_weather_timer(self):
+        self._fetch_weather()
+        self._arm_weather_timer()
 
     def _tick(self):
         now = datetime.now()
@@ -1174,15 +2889,13 @@ class SmartClockBackend(QObject):
             self._check_alarms(now)
             self._refresh_calendar()
             self._refresh_images_async()
-            if now.minute % 15 == 0:
-                self._fetch_weather()
         
         if date_str != self._current_date:
             self._current_date = date_str
             self.dateChanged.emit()
 
-        # Update Night Mode logic
-        is_night = (now.hour >= 22 or now.hour < 5)
+    def _update_night_mode(self, now):
+        is_night = self._is_night_time(now)
         #is_night = False
         
         if is_night != self._is_night_mode:
@@ -1196,12 +2909,7 @@ class SmartClockBackend(QObject):
                 self._inactivity_timer.stop()
                 self._set_screen_power(True)
 
-        if self.TAPO_IP and now.second % 2 == 0: self._check_light_status()
-
     def _check_alarms(self, now_dt):
-        current_time_str = now_dt.strftime("%H:%M")
-        current_weekday = str(now_dt.weekday()) 
-
         if self._snooze_until and now_dt.replace(second=0, microsecond=0) == self._snooze_until:
             self._active_alarm_id = self._snoozed_alarm_id
             self._snoozed_alarm_id = None
@@ -1212,14 +2920,75 @@ class SmartClockBackend(QObject):
                 self._set_screen_power(True)
             self.alarmTriggered.emit("Wake Up!")
 
-        for alarm in database.get_active_alarms():
-            if alarm['time'] == current_time_str:
-                if alarm['days'] == "Daily" or current_weekday in alarm['days'].split(","):
-                    self._active_alarm_id = alarm['id']
-                    if self.player.playbackState() != QMediaPlayer.PlaybackState.PlayingState: 
-                        self.player.play()
-                        self._set_screen_power(True) 
-                    self.alarmTriggered.emit("Wake Up!")
+        # Safety net for wall-clock jumps the monotonic QTimer can't see.
+        next_fire = self._alarm_scheduler.next_fire()
+        if next_fire is not None and next_fire <= now_dt:
+            self._on_alarm_timer()
+
+    def _reschedule_alarms(self):
+        """Rebuilds the alarm heap from the cached alarm list and re-arms the timer."""
+        active = [a for a in self._alarm_cache if a['active']]
+        self._alarm_scheduler.rebuild(active, datetime.now())
+        self._arm_alarm_timer()
+
+    def _sort_alarm_cache(self):
+        self._alarm_cache.sort(key=lambda a: (a['minute_of_day'], a['id']))
+
+    def _find_cached_alarm(self, alarm_id):
+        for alarm in self._alarm_cache:
+            if alarm['id'] == alarm_id:
+                return alarm
+        return None
+
+    def _alarms_updated(self):
+        self._reschedule_alarms()
+        self.alarmsChanged.emit()
+
+    def _arm_alarm_timer(self):
+        self._alarm_timer.stop()
+        next_fire = self._alarm_scheduler.next_fire()
+        if next_fire is None:
+            return
+        delay_ms = int((next_fire - datetime.now()).total_seconds() * 1000)
+        self._alarm_timer.start(max(0, delay_ms))
+
+    def _confirm_due_alarms(self, alarm_ids, now):
+        """
+        The heap only decides when to look; the alarms table decides what
+        rings. One indexed lookup per due minute drops ids whose row was
+        switched off or deleted since the heap was last rebuilt.
+        """
+        slots = set()
+        for alarm_id in alarm_ids:
+            alarm = self._find_cached_alarm(alarm_id)
+            if alarm is None:
+                continue
+            minute = alarm['minute_of_day']
+            # Within the scheduler's grace a 23:59 alarm can be popped after midnight.
+            day = now.date() if minute <= now.hour * 60 + now.minute else now.date() - timedelta(days=1)
+            slots.add((minute, day.weekday()))
+        try:
+            confirmed = set()
+            for minute, weekday in slots:
+                confirmed.update(database.get_alarms_due(minute, weekday))
+        except Exception as e:
+            # Better to ring from the heap than to miss an alarm over a DB error.
+            print(f"Alarm DB check failed, trusting the scheduler: {e}")
+            return alarm_ids
+        return [alarm_id for alarm_id in alarm_ids if alarm_id in confirmed]
+
+    def _on_alarm_timer(self):
+        now = datetime.now()
+        due = self._alarm_scheduler.pop_due(now)
+        if due:
+            due = self._confirm_due_alarms(due, now)
+        for alarm_id in due:
+            self._active_alarm_id = alarm_id
+            if self.player.playbackState() != QMediaPlayer.PlaybackState.PlayingState:
+                self.player.play()
+                self._set_screen_power(True)
+            self.alarmTriggered.emit("Wake Up!")
+        self._arm_alarm_timer()
 
     @Property(str, notify=timeChanged)
     def currentTime(self): return self._current_time
@@ -1233,7 +3002,11 @@ class SmartClockBackend(QObject):
             return ""
         return f"Snoozed until {self._snooze_until.strftime('%H:%M')}"
     @Property(list, notify=alarmsChanged)
-    def alarmList(self): return database.get_all_alarms()
+    def alarmList(self): return self._alarm_cache
+    @Slot(result="QVariantMap")
+    def databaseStats(self):
+        # Statements that reached SQLite this session; alarmList reads add none.
+        return database.get_stats()
     @Slot()
     def stopAlarm(self):
         self.player.stop()
@@ -1251,22 +3024,35 @@ class SmartClockBackend(QObject):
         self.snoozeChanged.emit()
     @Slot(int)
     def deleteAlarm(self, id):
-        conn = database.get_connection()
-        conn.execute("DELETE FROM alarms WHERE id = ?", (id,))
-        conn.commit(); conn.close()
+        database.delete_alarm(id)
         if self._active_alarm_id == id:
             self._active_alarm_id = None
         if self._snoozed_alarm_id == id:
             self._snoozed_alarm_id = None
             self._snooze_until = None
             self.snoozeChanged.emit()
-        self.alarmsChanged.emit()
+        self._alarm_cache = [a for a in self._alarm_cache if a['id'] != id]
+        self._alarms_updated()
     @Slot(str, str)
-    def createAlarm(self, t, d): database.add_alarm(t, d); self.alarmsChanged.emit()
+    def createAlarm(self, t, d):
+        self._alarm_cache.append(database.add_alarm(t, d))
+        self._sort_alarm_cache()
+        self._alarms_updated()
     @Slot(int, str, str)
-    def updateAlarm(self, id, t, d): database.update_alarm(id, t, d); self.alarmsChanged.emit()
+    def updateAlarm(self, id, t, d):
+        database.update_alarm(id, t, d)
+        alarm = self._find_cached_alarm(id)
+        if alarm is not None:
+            alarm.update(database.alarm_dict(id, database.time_to_minute(t), database.days_to_mask(d), alarm['active'], alarm['label']))
+            self._sort_alarm_cache()
+        self._alarms_updated()
     @Slot(int, bool)
-    def toggleAlarm(self, id, active): database.toggle_alarm(id, active); self.alarmsChanged.emit()
+    def toggleAlarm(self, id, active):
+        database.toggle_alarm(id, active)
+        alarm = self._find_cached_alarm(id)
+        if alarm is not None:
+            alarm['active'] = 1 if active else 0
+        self._alarms_updated()
 
 if __name__ == "__main__":
     app = QGuiApplication(sys.argv)
@@ -19,6 +19,7 @@ ApplicationWindow {
             bg1.source = slideshow.images.length > 0 ? slideshow.images[0] : ""
             bg2.source = ""
             slideshow.showBg1 = true
+            if (slideshow.images.length > 0) backend.reportImageShown(slideshow.images[0])
         }
     }
 
@@ -43,6 +44,7 @@ ApplicationWindow {
                 if (slideshow.showBg1) bg2.source = nextSource
                 else bg1.source = nextSource
                 slideshow.showBg1 = !slideshow.showBg1
+                backend.reportImageShown(nextSource)
             }
         }
         Image {
@@ -539,16 +541,8 @@ ApplicationWindow {
             function daysInMonth(anyDateInMonth) { return new Date(anyDateInMonth.getFullYear(), anyDateInMonth.getMonth() + 1, 0).getDate(); }
             function firstDayOffset(anyDateInMonth) { var d = new Date(anyDateInMonth.getFullYear(), anyDateInMonth.getMonth(), 1); var day = d.getDay(); return day === 0 ? 6 : day - 1; }
             function getCellDate(index) { var firstDay = new Date(viewDate.getFullYear(), viewDate.getMonth(), 1); var offset = firstDayOffset(firstDay); return new Date(viewDate.getFullYear(), viewDate.getMonth(), 1 + (index - offset)); }
-            function getEventsForDate(dateObj) {
-                var dayEvents = []
-                if (!backend.calendarEvents) return dayEvents 
-                var checkStr = Qt.formatDate(dateObj, "yyyy-MM-dd")
-                for(var i=0; i<backend.calendarEvents.length; i++) {
-                     var evIso = backend.calendarEvents[i].date_iso
-                     if (evIso.substring(0, 10) === checkStr) { dayEvents.push(backend.calendarEvents[i]) }
-                }
-                return dayEvents
-            }
+            // Bucketed by the backend once per calendar refresh; cells just look up their day.
+            property var monthIndex: { backend.calendarRevision; return backend.calendarMonthIndex(viewDate.getFullYear(), viewDate.getMonth() + 1) }
             Timer {
                 interval: 60000
                 running: true
@@ -595,8 +589,10 @@ ApplicationWindow {
                         Rectangle {
                             property date myDate: calendarPage.getCellDate(index)
                             property bool isCurrentMonth: myDate.getMonth() === calendarPage.viewDate.getMonth()
-                            property bool isToday: Qt.formatDate(myDate, "yyyy-MM-dd") === calendarPage.todayKey
-                            property var myEvents: calendarPage.getEventsForDate(myDate)
+                            property bool isToday: myKey === calendarPage.todayKey
+                            property string myKey: Qt.formatDate(myDate, "yyyy-MM-dd")
+                            property var dayInfo: calendarPage.monthIndex[myKey]
+                            property int eventCount: dayInfo ? dayInfo.count : 0
                             
                             Layout.fillWidth: true; Layout.fillHeight: true
                             color: isToday ? "#334facfe" : (isCurrentMonth ? "#22FFFFFF" : "transparent") 
@@ -614,7 +610,7 @@ ApplicationWindow {
                                 anchors.left: parent.left; anchors.right: parent.right; anchors.bottom: parent.bottom; anchors.margins: 2; spacing: 2
                                 visible: isCurrentMonth
                                 Repeater {
-                                    model: myEvents.length > 3 ? myEvents.slice(0, 3) : myEvents
+                                    model: dayInfo ? dayInfo.events : []
                                     Rectangle {
                                         height: 12; width: parent.width; color: "#4facfe"; radius: 6
                                         RowLayout {
@@ -624,14 +620,14 @@ ApplicationWindow {
                                         }
                                     }
                                 }
-                                Text { visible: myEvents.length > 3; text: "+" + (myEvents.length - 3) + " more"; color: "#888"; font.pixelSize: 10; anchors.horizontalCenter: parent.horizontalCenter }
+                                Text { visible: eventCount > 3; text: "+" + (eventCount - 3) + " more"; color: "#888"; font.pixelSize: 10; anchors.horizontalCenter: parent.horizontalCenter }
                             }
                             MouseArea {
                                 anchors.fill: parent
                                 onClicked: {
-                                    if (myEvents.length > 0) {
+                                    if (eventCount > 0) {
                                         dayDetailsPopup.selectedDate = myDate
-                                        dayDetailsPopup.eventsForDay = myEvents
+                                        dayDetailsPopup.eventsForDay = backend.calendarEventsForDate(myKey)
                                         dayDetailsPopup.open()
                                     }
                                 }
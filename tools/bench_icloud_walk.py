@@ -0,0 +1,99 @@
+# bench_icloud_walk.py
+"""
+Times the iCloud payload walkers (_collect_photo_guids, _collect_image_urls)
+on a synthetic shared album: 5,000 photos with 3 derivatives each, i.e. a
+webstream payload and a webasseturls payload with 15,000 asset items.
+
+    python tools/bench_icloud_walk.py                  # SmartDisplay/main.py
+    python tools/bench_icloud_walk.py old_main.py      # compare with another copy
+
+e.g. `git show af8d5bb^:SmartDisplay/main.py > old_main.py` for the walkers
+before they were made iterative. Prints best-of-N wall time per walk and
+the number of GUIDs / URLs found, which should match between versions.
+"""
+import sys
+import os
+import json
+import time
+import importlib.util
+
+PHOTOS = 5000
+DERIVATIVES = ("342", "2048", "full")
+RUNS = 5
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "SmartDisplay")
+
+
+def make_payloads(n=PHOTOS):
+    """Builds webstream and webasseturls payloads shaped like the real API."""
+    photos = []
+    items = {}
+    for i in range(n):
+        derivatives = {}
+        for size in DERIVATIVES:
+            checksum = f"{i:06d}{size}abcdef0123456789"
+            derivatives[size] = {"checksum": checksum, "fileSize": str(100000 + i), "width": "2048", "height": "1536"}
+            items[checksum] = {
+                "url_location": "cvws.icloud-content.com",
+                "url_path": f"/S/{checksum}/IMG_{i}.JPG?o=abc&v=1&z=https%3A%2F%2Fp12-content.icloud.com&x=1&a=CAo&e=1700000000&r=R{checksum}&s=sig",
+            }
+        photos.append({
+            "photoGuid": f"GUID{i:06d}",
+            "derivatives": derivatives,
+            "caption": "",
+            "contributorFirstName": "pat",
+            "contributorLastName": "x",
+            "contributorFullName": "pat x",
+            "batchGuid": f"B{i // 50}",
+            "dateCreated": "2024-01-01T00:00:00Z",
+            "batchDateCreated": "2024-01-01T00:00:00Z",
+            "mediaAssetType": "image",
+        })
+    webstream = {"streamCtag": "FT;1", "streamName": "Album", "userFirstName": "pat", "photos": photos, "itemsReturned": str(n)}
+    webasseturls = {"items": items, "locations": {"cvws.icloud-content.com": {"scheme": "https", "hosts": ["cvws.icloud-content.com"]}}}
+    # Round-trip through JSON so the payloads are the plain dicts/lists/strs
+    # requests would hand back.
+    return json.loads(json.dumps(webstream)), json.loads(json.dumps(webasseturls))
+
+
+def load_backend_class(path):
+    # main.py imports its sibling modules (database, audio...) by name.
+    if APP_DIR not in sys.path:
+        sys.path.insert(0, APP_DIR)
+    spec = importlib.util.spec_from_file_location("bench_main", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.SmartClockBackend
+
+
+def best_of(fn, runs=RUNS):
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(APP_DIR, "main.py")
+    backend_cls = load_backend_class(path)
+    # The walkers only need the instance for method lookup, so skip __init__
+    # (it opens the database, sessions and the derivative pool).
+    backend = backend_cls.__new__(backend_cls)
+    webstream, webasseturls = make_payloads()
+
+    walks = (
+        ("photoGuids from webstream", lambda out: backend._collect_photo_guids(webstream, out)),
+        ("image URLs from webstream", lambda out: backend._collect_image_urls(webstream, out)),
+        ("image URLs from webasseturls", lambda out: backend._collect_image_urls(webasseturls, out)),
+    )
+    print(f"{path}: {PHOTOS} photos x {len(DERIVATIVES)} derivatives, best of {RUNS}")
+    for label, walk in walks:
+        found = set()
+        walk(found)
+        elapsed = best_of(lambda: walk(set()))
+        print(f"  {label:<30} {elapsed:8.1f} ms  ({len(found)} found)")
+
+
+if __name__ == "__main__":
+    main()